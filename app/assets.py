@@ -0,0 +1,149 @@
+"""
+Static asset pipeline for TripCraft AI
+
+Source CSS/JS and vendored libraries are copied to app/static/dist under
+content-hashed names, with gzip and (when the brotli package is installed)
+brotli variants next to them. Templates link assets through asset_url(), and
+PrecompressedStaticFiles serves the best variant with long-lived caching.
+"""
+import os
+import gzip
+import json
+import hashlib
+from typing import Dict, Set
+
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+# Logical name -> source path relative to app/static
+ASSET_SOURCES = {
+    "app.css": "src/app.css",
+    "app.js": "src/app.js",
+    "htmx.min.js": "vendor/htmx-1.9.10.min.js",
+}
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+_manifest: Dict[str, Dict[str, str]] = {}
+
+def hashed_name(name: str, data: bytes) -> str:
+    stem, ext = name.split(".", 1)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.{ext}"
+
+def build_assets() -> Dict[str, Dict[str, str]]:
+    """Write fingerprinted and precompressed assets plus the manifest"""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    keep = {"manifest.json"}
+    for name, source in ASSET_SOURCES.items():
+        with open(os.path.join(STATIC_DIR, source), "rb") as f:
+            data = f.read()
+        filename = hashed_name(name, data)
+        variants = {filename: data, filename + ".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[filename + ".br"] = brotli.compress(data, quality=11)
+        for variant, content in variants.items():
+            path = os.path.join(DIST_DIR, variant)
+            if not os.path.exists(path):
+                with open(path, "wb") as f:
+                    f.write(content)
+            keep.add(variant)
+        manifest[name] = {"file": filename, "source_sha256": hashlib.sha256(data).hexdigest()}
+
+    for stale in set(os.listdir(DIST_DIR)) - keep:
+        os.remove(os.path.join(DIST_DIR, stale))
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return manifest
+
+def manifest_is_current(manifest: Dict[str, Dict[str, str]]) -> bool:
+    for name, source in ASSET_SOURCES.items():
+        entry = manifest.get(name)
+        if not entry or not os.path.exists(os.path.join(DIST_DIR, entry["file"])):
+            return False
+        with open(os.path.join(STATIC_DIR, source), "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != entry["source_sha256"]:
+                return False
+    return True
+
+def load_assets() -> None:
+    """Load the manifest, rebuilding it if sources changed since the last build"""
+    global _manifest
+    manifest = {}
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    if not manifest_is_current(manifest):
+        try:
+            manifest = build_assets()
+        except OSError as e:
+            # Read-only deployments fall back to the unhashed sources
+            print(f"Could not build static assets: {e}")
+            manifest = {}
+    _manifest = manifest
+
+def asset_url(name: str) -> str:
+    """URL of the fingerprinted asset, or of its source when no build exists"""
+    entry = _manifest.get(name)
+    if entry:
+        return f"/static/dist/{entry['file']}"
+    return f"/static/{ASSET_SOURCES[name]}"
+
+def accepted_encodings(header: str) -> Set[str]:
+    """Content codings the client accepts, honouring q=0 and the * wildcard"""
+    weights = {}
+    for token in header.split(","):
+        coding, *params = [part.strip() for part in token.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    wildcard = weights.pop("*", 0.0)
+    accepted = {coding for coding, q in weights.items() if q > 0}
+    if wildcard > 0:
+        accepted.update(coding for coding, _ in PrecompressedStaticFiles.ENCODINGS if coding not in weights)
+    return accepted
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that prefers .br/.gz siblings and marks hashed assets immutable"""
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    async def get_response(self, path, scope):
+        accepted = set()
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accepted = accepted_encodings(value.decode("latin-1"))
+        immutable = path.startswith("dist/") and path != "dist/manifest.json"
+
+        for encoding, suffix in self.ENCODINGS:
+            if encoding not in accepted or scope["method"] not in ("GET", "HEAD"):
+                continue
+            full_path, stat_result = self.lookup_path(path + suffix)
+            if stat_result is not None:
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["content-encoding"] = encoding
+                break
+        else:
+            response = await super().get_response(path, scope)
+
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE
+        return response
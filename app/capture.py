@@ -0,0 +1,132 @@
+"""
+Opt-in traffic capture for TripCraft AI
+
+When CAPTURE_REQUESTS_PATH is set, every request is appended to that file as
+one JSON line: route, sanitized form/JSON fields, status, timing and the LLM
+tokens spent serving it. replay_traffic.py re-drives these captures.
+"""
+import os
+import json
+import time
+import hashlib
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+
+CAPTURE_REQUESTS_PATH = os.getenv("CAPTURE_REQUESTS_PATH", "")
+CAPTURE_INCLUDE_TEXT = os.getenv("CAPTURE_INCLUDE_TEXT", "false").lower() == "true"
+CAPTURE_MAX_BODY = 64 * 1024
+
+# Form fields that are low-cardinality preferences and safe to keep verbatim
+SAFE_FIELDS = {"budget", "style", "duration", "destination"}
+
+# Per-request LLM usage; the dict is shared with child tasks so they can add to it
+LLM_USAGE: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_usage", default=None)
+
+def record_llm_usage(response: Any) -> None:
+    """Add an OpenAI response's token usage to the current request's record"""
+    usage = LLM_USAGE.get()
+    if usage is None:
+        return
+    usage["calls"] += 1
+    tokens = getattr(response, "usage", None)
+    if tokens is not None:
+        usage["prompt_tokens"] += getattr(tokens, "prompt_tokens", 0) or 0
+        usage["completion_tokens"] += getattr(tokens, "completion_tokens", 0) or 0
+
+def sanitize_value(key: str, value: Any) -> Any:
+    """Keep preference fields; replace free text with a same-length placeholder.
+
+    Nested objects and lists are walked, so text inside them is masked too;
+    list items are judged by the key that holds the list.
+    """
+    if isinstance(value, dict):
+        return {k: sanitize_value(k, v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize_value(key, item) for item in value]
+    if key in SAFE_FIELDS or CAPTURE_INCLUDE_TEXT or not isinstance(value, str):
+        return value
+    return "x" * len(value)
+
+def sanitize_body(content_type: str, body: bytes) -> Dict[str, Any]:
+    if not body:
+        return {}
+    if len(body) > CAPTURE_MAX_BODY:
+        return {"body_bytes": len(body)}
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            fields = parse_qsl(body.decode("utf-8"), keep_blank_values=True)
+            return {"form": {k: sanitize_value(k, v) for k, v in fields}}
+        if content_type.startswith("application/json"):
+            data = json.loads(body)
+            if isinstance(data, (dict, list)):
+                return {"json": sanitize_value("", data)}
+    except ValueError:
+        pass
+    return {"body_bytes": len(body)}
+
+def session_hash(headers: Dict[str, str]) -> Optional[str]:
+    """Stable pseudonym for the session cookie so replays can group requests"""
+    for part in headers.get("cookie", "").split(";"):
+        name, _, value = part.strip().partition("=")
+        if name == "session_id" and value:
+            return hashlib.sha256(value.encode()).hexdigest()[:16]
+    return None
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware that tees the request body and appends one record per request"""
+
+    def __init__(self, app, path: str = CAPTURE_REQUESTS_PATH):
+        self.app = app
+        self.path = path
+        self._file = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.time()
+        t0 = time.perf_counter()
+        chunks = []
+        state = {"status": None, "response_bytes": 0}
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["response_bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        token = LLM_USAGE.set(usage)
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            LLM_USAGE.reset(token)
+            headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+            record = {
+                "ts": round(started, 3),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": state["status"],
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 2),
+                "response_bytes": state["response_bytes"],
+                "session": session_hash(headers),
+                "user_agent": headers.get("user-agent", ""),
+                "content_type": headers.get("content-type", ""),
+                "llm": usage,
+            }
+            record.update(sanitize_body(record["content_type"], b"".join(chunks)))
+            self._write(record)
@@ -0,0 +1,68 @@
+"""
+Content-addressed payload encoding for TripCraft AI
+
+Itinerary and review bodies are stored once per distinct content, keyed by the
+SHA-256 of their canonical JSON, and optionally zlib-compressed.
+"""
+import os
+import json
+import zlib
+import hashlib
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+CONTENT_COMPRESSION = os.getenv("CONTENT_COMPRESSION", "zlib")
+CONTENT_CACHE_SIZE = int(os.getenv("CONTENT_CACHE_SIZE", "1024"))
+
+def canonical_json(payload: Any) -> bytes:
+    """Serialize a payload so equal content always produces equal bytes"""
+    return json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+def content_hash(payload: Any) -> str:
+    """SHA-256 of the canonical JSON, used as the blob _id"""
+    return hashlib.sha256(canonical_json(payload)).hexdigest()
+
+def encode_payload(payload: Any, compression: str = CONTENT_COMPRESSION) -> Tuple[str, str, bytes]:
+    """Return (content hash, encoding, stored bytes) for a payload"""
+    raw = canonical_json(payload)
+    digest = hashlib.sha256(raw).hexdigest()
+    if compression == "zlib":
+        return digest, "zlib", zlib.compress(raw, 6)
+    return digest, "json", raw
+
+def decode_payload(encoding: str, data: bytes) -> Any:
+    """Inverse of encode_payload"""
+    if encoding == "zlib":
+        data = zlib.decompress(data)
+    return json.loads(data)
+
+class PayloadCache:
+    """Small LRU of decoded payloads keyed by content hash"""
+
+    def __init__(self, maxsize: int = CONTENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, digest: str) -> Optional[Any]:
+        if digest in self._items:
+            self._items.move_to_end(digest)
+            self.hits += 1
+            return self._items[digest]
+        self.misses += 1
+        return None
+
+    def put(self, digest: str, payload: Any) -> None:
+        self._items[digest] = payload
+        self._items.move_to_end(digest)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def discard(self, digest: str) -> None:
+        self._items.pop(digest, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
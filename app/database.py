@@ -2,27 +2,214 @@
 MongoDB database configuration and models for TripCraft AI
 """
 import os
+import time
+import asyncio
+import functools
+from collections import deque
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from pymongo import MongoClient, UpdateOne, DESCENDING
+from pymongo.errors import (
+    BulkWriteError, ConnectionFailure, ExecutionTimeout, NetworkTimeout, OperationFailure,
+    PyMongoError, ServerSelectionTimeoutError, WaitQueueTimeoutError
+)
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable, Tuple
 from pydantic import BaseModel, Field
+from app.content_store import encode_payload, decode_payload, PayloadCache
 
 # MongoDB Configuration
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-DATABASE_NAME = "tripcraft_ai"
+DATABASE_NAME = os.getenv("MONGODB_DATABASE_NAME", "tripcraft_ai")
+
+# Connection pool and timeouts
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "1000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "2000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "2000"))
+MONGODB_TIMEOUT_MS = int(os.getenv("MONGODB_TIMEOUT_MS", "3000"))
+MONGODB_WRITE_CONCERN = os.getenv("MONGODB_WRITE_CONCERN", "1")
+
+# Health probe: ping every interval; MONGODB_DEGRADE_AFTER_PINGS consecutive
+# failed or slower-than-threshold round trips degrade
+MONGODB_PING_INTERVAL_SEC = float(os.getenv("MONGODB_PING_INTERVAL_SEC", "5"))
+MONGODB_SLOW_PING_MS = float(os.getenv("MONGODB_SLOW_PING_MS", "500"))
+MONGODB_DEGRADE_AFTER_PINGS = int(os.getenv("MONGODB_DEGRADE_AFTER_PINGS", "3"))
+
+# Errors that mean the server is unreachable or overloaded, as opposed to a
+# problem with one operation (duplicate key, validation, bad query)
+AVAILABILITY_ERRORS = (
+    ConnectionFailure, NetworkTimeout, ServerSelectionTimeoutError,
+    ExecutionTimeout, WaitQueueTimeoutError
+)
+
+# Retention (days); 0 drops the TTL index for that collection
+SESSION_RETENTION_DAYS = int(os.getenv("SESSION_RETENTION_DAYS", "30"))
+CHAT_RETENTION_DAYS = int(os.getenv("CHAT_RETENTION_DAYS", "180"))
+TTL_INDEXES = {
+    "sessions": ("last_activity", SESSION_RETENTION_DAYS),
+    "chat_messages": ("timestamp", CHAT_RETENTION_DAYS),
+}
 
 # Database connection
 client: Optional[AsyncIOMotorClient] = None
 database = None
+MONGO_HEALTH = {
+    "degraded": True,
+    "last_ping": None,
+    "rtt_ms": None,
+    "consecutive_failures": 0,
+    "bad_pings": 0,
+    "last_error": None,
+    "indexes_ready": False,
+}
+PING_SAMPLES = deque(maxlen=120)
 
-async def connect_to_mongo():
-    """Connect to MongoDB"""
+def write_concern(value: str):
+    return int(value) if value.isdigit() else value
+
+async def connect_to_mongo(timeout_ms: Optional[int] = MONGODB_TIMEOUT_MS):
+    """Connect to MongoDB; batch jobs pass timeout_ms=None for long-running operations"""
     global client, database
-    client = AsyncIOMotorClient(MONGODB_URL)
+    client = AsyncIOMotorClient(
+        MONGODB_URL,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+        timeoutMS=timeout_ms,
+        w=write_concern(MONGODB_WRITE_CONCERN)
+    )
     database = client[DATABASE_NAME]
+    # The first ping pays for connection setup, so the slow threshold does not apply
+    if not await ping_mongo(cold=True):
+        # health_check_loop creates the indexes once MongoDB answers
+        print(f"MongoDB unreachable, starting in degraded mode: {MONGO_HEALTH['last_error']}")
+        return
+    await ensure_indexes_once()
     print("Connected to MongoDB!")
 
+async def ping_mongo(cold: bool = False) -> bool:
+    """Ping the server, record the round trip and update the degraded flag.
+
+    A cold ping includes the TCP/TLS handshake, so it is neither sampled nor
+    compared against MONGODB_SLOW_PING_MS.
+    """
+    t0 = time.perf_counter()
+    try:
+        # Leave the driver room to report its own server selection error first
+        limit = max(MONGODB_SERVER_SELECTION_TIMEOUT_MS, MONGODB_TIMEOUT_MS) / 1000 + 1
+        await asyncio.wait_for(database.command("ping"), limit)
+    except (PyMongoError, asyncio.TimeoutError) as e:
+        record_error(e)
+        record_bad_ping()
+        return False
+    rtt_ms = (time.perf_counter() - t0) * 1000
+    if not cold:
+        PING_SAMPLES.append(rtt_ms)
+    MONGO_HEALTH.update(
+        last_ping=datetime.utcnow().isoformat(),
+        rtt_ms=round(rtt_ms, 2),
+        consecutive_failures=0
+    )
+    if not cold and rtt_ms > MONGODB_SLOW_PING_MS:
+        record_bad_ping()
+    else:
+        MONGO_HEALTH.update(bad_pings=0, degraded=False)
+    return not MONGO_HEALTH["degraded"]
+
+def record_bad_ping() -> None:
+    """Degrade once enough consecutive pings failed or were slow; one sample is noise"""
+    MONGO_HEALTH["bad_pings"] += 1
+    if MONGO_HEALTH["bad_pings"] >= MONGODB_DEGRADE_AFTER_PINGS:
+        MONGO_HEALTH["degraded"] = True
+
+def record_error(error: Exception) -> None:
+    MONGO_HEALTH["consecutive_failures"] += 1
+    MONGO_HEALTH["last_error"] = f"{type(error).__name__}: {str(error) or 'timed out'}"[:300]
+
+def mark_unhealthy(error: Exception) -> None:
+    """Enter degraded mode until the next successful ping"""
+    MONGO_HEALTH["degraded"] = True
+    record_error(error)
+
+async def health_check_loop():
+    """Background task: ping MongoDB every MONGODB_PING_INTERVAL_SEC"""
+    while True:
+        await asyncio.sleep(MONGODB_PING_INTERVAL_SEC)
+        if database is not None and await ping_mongo() and not MONGO_HEALTH["indexes_ready"]:
+            await ensure_indexes_once()
+
+async def compaction_loop():
+    """Background task: drop expired popularity buckets every POPULARITY_COMPACT_INTERVAL_SEC"""
+    while True:
+        if db_manager.available:
+            try:
+                deleted = await db_manager.compact_popularity()
+                if deleted:
+                    print(f"Compacted {deleted} expired popularity counters")
+            except PyMongoError as e:
+                print(f"Popularity compaction failed: {e}")
+        await asyncio.sleep(POPULARITY_COMPACT_INTERVAL_SEC)
+
+def mongo_metrics() -> Dict[str, Any]:
+    """Connection health and ping latency summary for /metrics.json"""
+    ordered = sorted(PING_SAMPLES)
+    pick = lambda pct: round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 2) if ordered else None
+    return dict(MONGO_HEALTH, ping_p50_ms=pick(0.5), ping_p95_ms=pick(0.95), max_pool_size=MONGODB_MAX_POOL_SIZE)
+
+async def ensure_indexes_once():
+    """Create indexes unless done already; a failure is retried on the next healthy ping"""
+    if MONGO_HEALTH["indexes_ready"]:
+        return
+    try:
+        await ensure_indexes()
+    except PyMongoError as e:
+        print(f"Could not create MongoDB indexes: {e}")
+        return
+    MONGO_HEALTH["indexes_ready"] = True
+
+async def ensure_indexes():
+    """Create the indexes the query paths rely on"""
+    await ensure_popularity_indexes(database.destination_popularity)
+    await database.chat_messages.create_index([("session_id", 1), ("timestamp", -1)])
+    await database.travel_plans.create_index([("session_id", 1), ("created_at", -1)])
+    await database.travel_plans.create_index("created_at")
+    for field in CONTENT_REF_FIELDS:
+        # Backs the reference lookup in prune_content_blobs
+        await database.travel_plans.create_index(field)
+    for collection, (field, days) in TTL_INDEXES.items():
+        if days > 0:
+            await ensure_ttl_index(collection, field, days * 86400)
+        else:
+            await drop_ttl_index(collection, field)
+
+async def ensure_popularity_indexes(collection):
+    """Indexes for top-K counter reads and the per-bucket upsert key"""
+    await collection.create_index([("bucket", 1), ("style", 1), ("count", DESCENDING)])
+    await collection.create_index([("bucket", 1), ("style", 1), ("destination_key", 1)], unique=True)
+
+async def ensure_ttl_index(collection: str, field: str, expire_after: int):
+    """Create a TTL index, or update its expiry if retention was reconfigured"""
+    try:
+        await database[collection].create_index(field, expireAfterSeconds=expire_after)
+    except OperationFailure as e:
+        # IndexOptionsConflict: the index exists with a different expiry
+        if e.code != 85:
+            raise
+        await database.command(
+            "collMod", collection,
+            index={"keyPattern": {field: 1}, "expireAfterSeconds": expire_after}
+        )
+
+async def drop_ttl_index(collection: str, field: str):
+    """Remove a TTL index left from an earlier retention setting; 0 days means keep forever"""
+    async for index in database[collection].list_indexes():
+        if "expireAfterSeconds" in index and dict(index["key"]) == {field: 1}:
+            await database[collection].drop_index(index["name"])
+            print(f"Dropped TTL index {index['name']} on {collection}")
+
 async def close_mongo_connection():
     """Close MongoDB connection"""
     global client
@@ -46,6 +233,8 @@ class TravelPlan(BaseModel):
     duration: str = Field(..., description="Trip duration")
     itinerary: Dict[str, Any] = Field(default_factory=dict)
     reviews: List[Dict[str, Any]] = Field(default_factory=list)
+    itinerary_ref: Optional[str] = Field(None, description="Content hash of the stored itinerary")
+    reviews_ref: Optional[str] = Field(None, description="Content hash of the stored reviews")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -66,11 +255,110 @@ class Destination(BaseModel):
     best_time_to_visit: str = Field(..., description="Best time to visit")
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class PopularityCounter(BaseModel):
+    destination_key: str = Field(..., description="Normalized destination name")
+    destination: str = Field(..., description="Destination display name")
+    style: str = Field(..., description="Travel style, or '*' for all styles")
+    bucket: str = Field(..., description="Time window: 'all', 'd:YYYY-MM-DD', 'w:YYYY-Www' or a rolling '7d'")
+    count: int = Field(0, description="Number of plans saved in this window")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+# Popularity aggregation
+ALL_STYLES = "*"
+ALL_TIME_BUCKET = "all"
+POPULARITY_DAY_RETENTION = int(os.getenv("POPULARITY_DAY_RETENTION", "30"))
+POPULARITY_WEEK_RETENTION = int(os.getenv("POPULARITY_WEEK_RETENTION", "12"))
+POPULARITY_COMPACT_INTERVAL_SEC = int(os.getenv("POPULARITY_COMPACT_INTERVAL_SEC", "3600"))
+# Trending sums this many day buckets, so it must not exceed POPULARITY_DAY_RETENTION
+TRENDING_WINDOW_DAYS = min(int(os.getenv("TRENDING_WINDOW_DAYS", "7")), POPULARITY_DAY_RETENTION)
+POPULARITY_STAGING = "destination_popularity_rebuild"
+
+# Unreferenced content blobs are kept this long after their last use
+CONTENT_PRUNE_GRACE_SEC = int(os.getenv("CONTENT_PRUNE_GRACE_SEC", "86400"))
+CONTENT_REF_FIELDS = ("itinerary_ref", "reviews_ref")
+
+def destination_key(name: str) -> str:
+    """Normalize a destination name so counters for 'Bali' and ' bali ' merge"""
+    return " ".join(name.lower().split())
+
+def day_bucket(when: datetime) -> str:
+    return f"d:{when.strftime('%Y-%m-%d')}"
+
+def week_bucket(when: datetime) -> str:
+    year, week, _ = when.isocalendar()
+    return f"w:{year}-W{week:02d}"
+
+def popularity_buckets(when: datetime) -> List[str]:
+    """Time windows a plan created at ``when`` counts towards"""
+    return [ALL_TIME_BUCKET, day_bucket(when), week_bucket(when)]
+
+def popularity_updates(destination: str, style: str, when: datetime, count: int = 1,
+                       include_all_time: bool = True) -> List[UpdateOne]:
+    """Upserts that add ``count`` plans to every (bucket, style) counter"""
+    key = destination_key(destination)
+    now = datetime.utcnow()
+    ops = []
+    for bucket in popularity_buckets(when):
+        if bucket == ALL_TIME_BUCKET and not include_all_time:
+            continue
+        for style_key in (style, ALL_STYLES):
+            ops.append(UpdateOne(
+                {"bucket": bucket, "style": style_key, "destination_key": key},
+                {
+                    "$inc": {"count": count},
+                    "$set": {"destination": destination, "updated_at": now}
+                },
+                upsert=True
+            ))
+    return ops
+
 # Database Operations
+def degradable(default: Callable[[], Any] = lambda: None, cached: bool = False):
+    """Skip the operation while MongoDB is degraded and fail soft on driver errors.
+
+    Only AVAILABILITY_ERRORS switch the app to degraded mode; other driver
+    errors fail just this call. With ``cached``, the last successful result
+    for the same arguments is served instead of ``default()``.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            if self.available:
+                try:
+                    result = await method(self, *args, **kwargs)
+                except AVAILABILITY_ERRORS as e:
+                    mark_unhealthy(e)
+                    print(f"MongoDB {method.__name__} failed, degrading: {e}")
+                except PyMongoError as e:
+                    print(f"MongoDB {method.__name__} failed: {e}")
+                else:
+                    if cached:
+                        self.read_cache.put(key, result)
+                    return result
+            if cached:
+                stale = self.read_cache.get(key)
+                if stale is not None:
+                    return stale
+            return default()
+        return wrapper
+    return decorator
+
 class DatabaseManager:
     def __init__(self):
-        self.db = database
+        self.content_cache = PayloadCache()
+        self.read_cache = PayloadCache()
 
+    @property
+    def db(self):
+        """The connected database, resolved at call time rather than import time"""
+        return database
+
+    @property
+    def available(self) -> bool:
+        return database is not None and not MONGO_HEALTH["degraded"]
+
+    @degradable()
     async def create_user_session(self, session_id: str, preferences: Dict[str, Any] = None) -> UserSession:
         """Create a new user session"""
         session = UserSession(
@@ -80,6 +368,7 @@ class DatabaseManager:
         await self.db.sessions.insert_one(session.dict())
         return session
 
+    @degradable(cached=True)
     async def get_user_session(self, session_id: str) -> Optional[UserSession]:
         """Get user session by ID"""
         session_data = await self.db.sessions.find_one({"session_id": session_id})
@@ -87,37 +376,168 @@ class DatabaseManager:
             return UserSession(**session_data)
         return None
 
+    @degradable(lambda: False)
     async def update_user_session(self, session_id: str, preferences: Dict[str, Any]) -> bool:
-        """Update user session preferences"""
+        """Update user session preferences, creating the session on first interaction"""
+        now = datetime.utcnow()
         result = await self.db.sessions.update_one(
             {"session_id": session_id},
             {
                 "$set": {
                     "preferences": preferences,
-                    "last_activity": datetime.utcnow()
-                }
-            }
+                    "last_activity": now
+                },
+                "$setOnInsert": {"created_at": now}
+            },
+            upsert=True
         )
-        return result.modified_count > 0
+        return result.modified_count > 0 or result.upserted_id is not None
 
+    @degradable(lambda: False)
     async def save_travel_plan(self, travel_plan: TravelPlan) -> bool:
-        """Save a travel plan"""
-        result = await self.db.travel_plans.insert_one(travel_plan.dict())
-        return result.inserted_id is not None
+        """Save a travel plan, storing its itinerary and reviews as shared content blobs"""
+        plan_data = travel_plan.dict()
+        plan_data["itinerary_ref"], plan_data["reviews_ref"] = await self.put_contents([
+            ("itinerary", plan_data.pop("itinerary")),
+            ("reviews", plan_data.pop("reviews"))
+        ])
+        result = await self.db.travel_plans.insert_one(plan_data)
+        if result.inserted_id is not None:
+            await self.record_popularity(travel_plan.destination, travel_plan.style, travel_plan.created_at)
+            return True
+        return False
 
+    @degradable()
+    async def record_popularity(self, destination: str, style: str, when: datetime = None) -> None:
+        """Increment the popularity counters for a saved plan in one round trip"""
+        ops = popularity_updates(destination, style, when or datetime.utcnow())
+        await self.db.destination_popularity.bulk_write(ops, ordered=False)
+
+    @degradable(list, cached=True)
     async def get_travel_plans(self, session_id: str) -> List[TravelPlan]:
         """Get all travel plans for a session"""
         cursor = self.db.travel_plans.find({"session_id": session_id}).sort("created_at", -1)
+        plan_docs = [plan_data async for plan_data in cursor]
+        refs = [plan_data.get(field) for plan_data in plan_docs for field in ("itinerary_ref", "reviews_ref")]
+        contents = await self.get_contents([ref for ref in refs if ref])
+
         plans = []
-        async for plan_data in cursor:
+        for plan_data in plan_docs:
+            # Plans saved before content addressing keep their payloads inline
+            if plan_data.get("itinerary_ref"):
+                plan_data["itinerary"] = contents.get(plan_data["itinerary_ref"], {})
+            if plan_data.get("reviews_ref"):
+                plan_data["reviews"] = contents.get(plan_data["reviews_ref"], [])
             plans.append(TravelPlan(**plan_data))
         return plans
 
+    async def put_contents(self, items: List[Tuple[str, Any]]) -> List[str]:
+        """Store (kind, payload) pairs once under their content hashes in one round trip"""
+        now = datetime.utcnow()
+        digests = []
+        payloads = {}
+        ops = {}
+        for kind, payload in items:
+            digest, encoding, data = encode_payload(payload)
+            digests.append(digest)
+            # Always upsert, even on a cache hit: the blob may have been pruned
+            # since it was cached, and last_used_at protects it from the next prune
+            ops[digest] = UpdateOne(
+                {"_id": digest},
+                {
+                    "$setOnInsert": {
+                        "kind": kind,
+                        "encoding": encoding,
+                        "data": data,
+                        "size": len(data),
+                        "created_at": now
+                    },
+                    "$set": {"last_used_at": now}
+                },
+                upsert=True
+            )
+            payloads[digest] = payload
+        try:
+            await self.db.content_blobs.bulk_write(list(ops.values()), ordered=False)
+        except BulkWriteError as e:
+            # A concurrent request stored the same content first
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+        for digest, payload in payloads.items():
+            self.content_cache.put(digest, payload)
+        return digests
+
+    async def get_contents(self, digests: List[str]) -> Dict[str, Any]:
+        """Resolve content hashes through the cache, fetching misses in one query"""
+        contents = {}
+        missing = []
+        for digest in dict.fromkeys(digests):
+            payload = self.content_cache.get(digest)
+            if payload is None:
+                missing.append(digest)
+            else:
+                contents[digest] = payload
+        if missing:
+            async for blob in self.db.content_blobs.find({"_id": {"$in": missing}}):
+                payload = decode_payload(blob["encoding"], blob["data"])
+                self.content_cache.put(blob["_id"], payload)
+                contents[blob["_id"]] = payload
+        return contents
+
+    async def prune_content_blobs(self, grace_sec: int = CONTENT_PRUNE_GRACE_SEC, batch_size: int = 1000) -> int:
+        """Delete content blobs that no plan references and nothing used within the grace window.
+
+        The anti-join runs on the server: each candidate blob probes the indexed
+        ref fields for a single referencing plan. The grace window covers saves
+        whose blob upsert has landed but whose plan insert has not.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_sec)
+        unused = {"created_at": {"$lt": cutoff}, "last_used_at": {"$not": {"$gte": cutoff}}}
+        pipeline = [{"$match": unused}, {"$project": {"_id": 1}}]
+        for field in CONTENT_REF_FIELDS:
+            pipeline.append({"$lookup": {
+                "from": "travel_plans",
+                "localField": "_id",
+                "foreignField": field,
+                "pipeline": [{"$limit": 1}, {"$project": {"_id": 1}}],
+                "as": field
+            }})
+        pipeline.append({"$match": {field: {"$size": 0} for field in CONTENT_REF_FIELDS}})
+
+        deleted = 0
+        stale = []
+        async for blob in self.db.content_blobs.aggregate(pipeline, batchSize=batch_size):
+            stale.append(blob["_id"])
+            if len(stale) >= batch_size:
+                deleted += await self._delete_blobs(stale, unused)
+                stale = []
+        if stale:
+            deleted += await self._delete_blobs(stale, unused)
+        return deleted
+
+    async def _delete_blobs(self, digests: List[str], unused: Dict[str, Any]) -> int:
+        # Re-check last_used_at so a blob reused since the scan survives
+        result = await self.db.content_blobs.delete_many({"_id": {"$in": digests}, **unused})
+        for digest in digests:
+            self.content_cache.discard(digest)
+        return result.deleted_count
+
+    @degradable(lambda: False)
+    async def delete_travel_plan(self, plan_id: str, session_id: str) -> bool:
+        """Delete a travel plan owned by the session"""
+        result = await self.db.travel_plans.delete_one({
+            "plan_id": plan_id,
+            "session_id": session_id
+        })
+        return result.deleted_count > 0
+
+    @degradable(lambda: False)
     async def save_chat_message(self, chat_message: ChatMessage) -> bool:
         """Save a chat message"""
         result = await self.db.chat_messages.insert_one(chat_message.dict())
         return result.inserted_id is not None
 
+    @degradable(list, cached=True)
     async def get_chat_history(self, session_id: str, limit: int = 50) -> List[ChatMessage]:
         """Get chat history for a session"""
         cursor = self.db.chat_messages.find({"session_id": session_id}).sort("timestamp", -1).limit(limit)
@@ -126,11 +546,13 @@ class DatabaseManager:
             messages.append(ChatMessage(**message_data))
         return messages[::-1]  # Reverse to get chronological order
 
+    @degradable(lambda: False)
     async def save_destination(self, destination: Destination) -> bool:
         """Save a destination"""
         result = await self.db.destinations.insert_one(destination.dict())
         return result.inserted_id is not None
 
+    @degradable(list, cached=True)
     async def search_destinations(self, query: str, limit: int = 10) -> List[Destination]:
         """Search destinations by name or description"""
         cursor = self.db.destinations.find({
@@ -141,13 +563,124 @@ class DatabaseManager:
             destinations.append(Destination(**dest_data))
         return destinations
 
+    @degradable(list, cached=True)
+    async def get_top_destinations(self, limit: int = 10, style: Optional[str] = None,
+                                   bucket: str = ALL_TIME_BUCKET) -> List[PopularityCounter]:
+        """Read the top-K counters for a time window, optionally for one travel style"""
+        cursor = self.db.destination_popularity.find({
+            "bucket": bucket,
+            "style": style or ALL_STYLES
+        }).sort("count", DESCENDING).limit(limit)
+        counters = []
+        async for counter_data in cursor:
+            counters.append(PopularityCounter(**counter_data))
+        return counters
+
+    @degradable(list, cached=True)
+    async def get_trending_destinations(self, limit: int = 10, style: Optional[str] = None,
+                                        days: int = TRENDING_WINDOW_DAYS) -> List[PopularityCounter]:
+        """Most planned destinations over the last ``days`` day buckets, including today"""
+        now = datetime.utcnow()
+        buckets = [day_bucket(now - timedelta(days=offset)) for offset in range(days)]
+        cursor = self.db.destination_popularity.aggregate([
+            {"$match": {"bucket": {"$in": buckets}, "style": style or ALL_STYLES}},
+            {"$group": {
+                "_id": "$destination_key",
+                "destination": {"$last": "$destination"},
+                "count": {"$sum": "$count"},
+                "updated_at": {"$max": "$updated_at"}
+            }},
+            {"$sort": {"count": DESCENDING, "_id": 1}},
+            {"$limit": limit}
+        ])
+        counters = []
+        async for row in cursor:
+            counters.append(PopularityCounter(
+                destination_key=row["_id"],
+                destination=row["destination"],
+                style=style or ALL_STYLES,
+                bucket=f"{days}d",
+                count=row["count"],
+                updated_at=row["updated_at"]
+            ))
+        return counters
+
+    @degradable(list, cached=True)
     async def get_popular_destinations(self, limit: int = 10) -> List[Destination]:
-        """Get popular destinations"""
-        cursor = self.db.destinations.find().sort("created_at", -1).limit(limit)
-        destinations = []
+        """Get popular destinations, ranked by the all-time plan counters"""
+        counters = await self.get_top_destinations(limit)
+        if not counters:
+            cursor = self.db.destinations.find().sort("created_at", -1).limit(limit)
+            destinations = []
+            async for dest_data in cursor:
+                destinations.append(Destination(**dest_data))
+            return destinations
+
+        by_key = {}
+        cursor = self.db.destinations.find({"name": {"$in": [c.destination for c in counters]}})
         async for dest_data in cursor:
-            destinations.append(Destination(**dest_data))
-        return destinations
+            by_key[destination_key(dest_data["name"])] = Destination(**dest_data)
+        return [by_key[c.destination_key] for c in counters if c.destination_key in by_key]
+
+    async def compact_popularity(self, day_retention: int = POPULARITY_DAY_RETENTION,
+                                 week_retention: int = POPULARITY_WEEK_RETENTION) -> int:
+        """Drop day and week counters that fell out of their retention window"""
+        now = datetime.utcnow()
+        oldest_day = day_bucket(now - timedelta(days=day_retention))
+        oldest_week = week_bucket(now - timedelta(weeks=week_retention))
+        result = await self.db.destination_popularity.delete_many({
+            "$or": [
+                {"bucket": {"$regex": "^d:", "$lt": oldest_day}},
+                {"bucket": {"$regex": "^w:", "$lt": oldest_week}}
+            ]
+        })
+        return result.deleted_count
+
+    async def rebuild_popularity(self, batch_size: int = 1000, include_all_time: bool = False) -> int:
+        """Recompute the popularity counters from travel_plans and swap them in.
+
+        Counters are built in a staging collection and renamed over the live
+        one, so readers never see a partial rebuild. Archived plans are no
+        longer in travel_plans, so by default the all-time counters are
+        carried over from the live collection instead of being recomputed;
+        ``include_all_time`` recounts them from the remaining plans only.
+        """
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    "destination": "$destination",
+                    "style": "$style",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}
+                },
+                "count": {"$sum": 1}
+            }}
+        ]
+        staging = self.db[POPULARITY_STAGING]
+        await staging.drop()
+        await ensure_popularity_indexes(staging)
+        ops = []
+        groups = 0
+        async for group in self.db.travel_plans.aggregate(pipeline, allowDiskUse=True):
+            key = group["_id"]
+            when = datetime.strptime(key["day"], "%Y-%m-%d")
+            ops.extend(popularity_updates(key["destination"], key["style"], when, group["count"], include_all_time))
+            groups += 1
+            if len(ops) >= batch_size:
+                await staging.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            await staging.bulk_write(ops, ordered=False)
+
+        if not include_all_time:
+            # Copied last to keep the window for missed concurrent saves short
+            await self.db.destination_popularity.aggregate([
+                {"$match": {"bucket": ALL_TIME_BUCKET}},
+                {"$project": {"_id": 0}},
+                {"$merge": {"into": POPULARITY_STAGING}}
+            ]).to_list(None)
+        await staging.rename("destination_popularity", dropTarget=True)
+        await self.compact_popularity()
+        return groups
 
 # Global database manager instance
 db_manager = DatabaseManager()
@@ -0,0 +1,146 @@
+"""
+Per-task model routing for TripCraft AI
+
+Each LLM task (reviews, destination recommendations, itineraries, chat) has its
+own route: model, token budget, temperature and an OpenAI-compatible base URL,
+so light tasks can go to a smaller or self-hosted model. Every route can be
+overridden from the environment, e.g. LLM_REVIEWS_MODEL, LLM_REVIEWS_BASE_URL,
+LLM_ITINERARY_TOKENS_PER_DAY. Latency and token usage are kept per task.
+
+The OpenAI client is synchronous, so calls run in a worker thread to keep the
+event loop (and the MongoDB health ping timed on it) responsive.
+"""
+import os
+import re
+import time
+import asyncio
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import openai
+from pydantic import BaseModel, Field
+
+from app.capture import record_llm_usage
+
+class ModelRoute(BaseModel):
+    model: str = Field("gpt-3.5-turbo", description="Model name sent to the server")
+    max_tokens: int = Field(500, description="Completion budget, before duration scaling")
+    tokens_per_day: int = Field(0, description="Extra completion tokens per trip day")
+    min_tokens: int = Field(0, description="Lower bound after duration scaling")
+    max_tokens_cap: int = Field(4000, description="Upper bound after duration scaling")
+    temperature: float = Field(0.7)
+    base_url: Optional[str] = Field(None, description="OpenAI-compatible endpoint; None uses OpenAI")
+    api_key: Optional[str] = Field(None, description="Key for base_url; defaults to OPENAI_API_KEY")
+
+    def tokens_for(self, duration: Optional[str] = None) -> int:
+        """Completion budget for a trip of the given duration"""
+        if not self.tokens_per_day or not duration:
+            return self.max_tokens
+        scaled = max(self.min_tokens, self.max_tokens + self.tokens_per_day * trip_days(duration))
+        return min(self.max_tokens_cap, scaled)
+
+DEFAULT_ROUTES = {
+    "reviews": ModelRoute(max_tokens=600, temperature=0.8),
+    "recommend": ModelRoute(max_tokens=500, temperature=0.7),
+    # Short trips keep the original fixed budget of 1000; truncated JSON falls back to a canned itinerary
+    "itinerary": ModelRoute(max_tokens=250, tokens_per_day=150, min_tokens=1000, max_tokens_cap=3000,
+                            temperature=0.7),
+    "chat": ModelRoute(max_tokens=500, temperature=0.7),
+}
+
+def route_from_env(task: str, default: ModelRoute) -> ModelRoute:
+    prefix = f"LLM_{task.upper()}_"
+    overrides = {}
+    for field, cast in (("model", str), ("max_tokens", int), ("tokens_per_day", int), ("min_tokens", int),
+                        ("max_tokens_cap", int), ("temperature", float), ("base_url", str), ("api_key", str)):
+        value = os.getenv(prefix + field.upper())
+        if value:
+            overrides[field] = cast(value)
+    return default.copy(update=overrides)
+
+ROUTES: Dict[str, ModelRoute] = {task: route_from_env(task, route) for task, route in DEFAULT_ROUTES.items()}
+
+def trip_days(duration: str) -> int:
+    """Approximate day count for form values like 'weekend', '1week', '2weeks', '10 days'"""
+    text = duration.lower()
+    if "weekend" in text:
+        return 3
+    match = re.search(r"(\d+)", text)
+    count = int(match.group(1)) if match else 1
+    if "week" in text:
+        return count * 7
+    if "month" in text:
+        return count * 30
+    return count
+
+class TaskStats:
+    """Rolling latency and token usage for one task"""
+
+    def __init__(self, window: int = 500):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies_ms = deque(maxlen=window)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+        pick = lambda pct: round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1) if ordered else None
+        succeeded = self.calls - self.errors
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ms": pick(0.5),
+            "p95_ms": pick(0.95),
+            "avg_prompt_tokens": round(self.prompt_tokens / succeeded, 1) if succeeded else None,
+            "avg_completion_tokens": round(self.completion_tokens / succeeded, 1) if succeeded else None,
+        }
+
+LLM_STATS: Dict[str, TaskStats] = {task: TaskStats() for task in ROUTES}
+_clients: Dict[tuple, Any] = {}
+
+def get_client(route: ModelRoute):
+    """One client (and connection pool) per endpoint"""
+    key = (route.base_url, route.api_key)
+    if key not in _clients:
+        kwargs = {}
+        if route.base_url:
+            kwargs["base_url"] = route.base_url
+            # Local servers usually ignore the key but the client requires one
+            kwargs["api_key"] = route.api_key or os.getenv("OPENAI_API_KEY") or "not-needed"
+        elif route.api_key:
+            kwargs["api_key"] = route.api_key
+        _clients[key] = openai.OpenAI(**kwargs)
+    return _clients[key]
+
+async def chat_completion(task: str, messages: List[Dict[str, str]], duration: Optional[str] = None):
+    """Run a chat completion on the task's route and record its latency and usage"""
+    route = ROUTES[task]
+    stats = LLM_STATS.setdefault(task, TaskStats())
+    stats.calls += 1
+    t0 = time.perf_counter()
+    try:
+        response = await asyncio.to_thread(
+            get_client(route).chat.completions.create,
+            model=route.model,
+            messages=messages,
+            max_tokens=route.tokens_for(duration),
+            temperature=route.temperature
+        )
+    except Exception:
+        stats.errors += 1
+        raise
+    stats.latencies_ms.append((time.perf_counter() - t0) * 1000)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        stats.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        stats.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+    record_llm_usage(response)
+    return response
+
+def llm_metrics() -> Dict[str, Any]:
+    """Per-task routing and performance summary for /metrics.json"""
+    return {
+        task: dict(stats.summary(), model=ROUTES[task].model, base_url=ROUTES[task].base_url)
+        for task, stats in LLM_STATS.items() if task in ROUTES
+    }
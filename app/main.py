@@ -1,17 +1,23 @@
 import time
 import os
+import re
+import asyncio
 import json
 import uuid
 import requests
 from bs4 import BeautifulSoup
-from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi import FastAPI, Request, Form, HTTPException, Query
 from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from dotenv import load_dotenv
 import openai
 from pydantic import BaseModel
 from app.database import connect_to_mongo, close_mongo_connection, db_manager, TravelPlan, ChatMessage, UserSession
+from app.database import health_check_loop, compaction_loop, mongo_metrics
+from app.retention import archiver_loop, archiver_metrics, validate_retention_config
+from app.capture import TrafficCaptureMiddleware, CAPTURE_REQUESTS_PATH
+from app.llm import chat_completion, llm_metrics
+from app.assets import PrecompressedStaticFiles, load_assets, asset_url
 
 # Chat model
 class ChatMessage(BaseModel):
@@ -23,26 +29,41 @@ load_dotenv()
 app = FastAPI()
 START_TIME = time.time()
 REQ_COUNT = {"total": 0}
+BACKGROUND_TASKS = {}
+# Archival deletes from MongoDB; it is opt-in and needs a durable ARCHIVE_DIR
+ARCHIVER_ENABLED = os.getenv("ARCHIVER_ENABLED", "false").lower() == "true"
+BOT_USER_AGENT = re.compile(r"bot|crawl|spider|slurp|preview|monitor|curl|wget|python-requests|headless", re.I)
 
 @app.on_event("startup")
 async def startup_event():
     """Connect to MongoDB on startup"""
     await connect_to_mongo()
+    BACKGROUND_TASKS["mongo_health"] = asyncio.create_task(health_check_loop())
+    BACKGROUND_TASKS["popularity_compaction"] = asyncio.create_task(compaction_loop())
+    if ARCHIVER_ENABLED:
+        validate_retention_config()
+        BACKGROUND_TASKS["archiver"] = asyncio.create_task(archiver_loop())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close MongoDB connection on shutdown"""
+    for task in BACKGROUND_TASKS.values():
+        task.cancel()
     await close_mongo_connection()
 
+def is_bot(request: Request) -> bool:
+    """Heuristic check for crawlers and uptime monitors"""
+    user_agent = request.headers.get("user-agent", "")
+    return not user_agent or bool(BOT_USER_AGENT.search(user_agent))
+
 # Configure OpenAI
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-def get_tripadvisor_reviews(destination: str, style: str) -> list:
+async def get_tripadvisor_reviews(destination: str, style: str) -> list:
     """
     Generate realistic TripAdvisor-style reviews for a destination
     """
     try:
-        client = openai.OpenAI()
         prompt = f"""
         Generate 3 realistic TripAdvisor reviews for {destination} that would appeal to {style} travelers.
         
@@ -69,14 +90,12 @@ def get_tripadvisor_reviews(destination: str, style: str) -> list:
         Make the reviews authentic and specific to {destination} and {style} travel preferences.
         """
         
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        response = await chat_completion(
+            "reviews",
+            [
                 {"role": "system", "content": "You are a travel expert who creates authentic TripAdvisor-style reviews."},
                 {"role": "user", "content": prompt}
-            ],
-            max_tokens=600,
-            temperature=0.8
+            ]
         )
         
         content = response.choices[0].message.content.strip()
@@ -167,15 +186,29 @@ async def count_requests(request, call_next):
     REQ_COUNT["total"] += 1
     return await call_next(request)
 
+if CAPTURE_REQUESTS_PATH:
+    app.add_middleware(TrafficCaptureMiddleware)
+
 @app.get("/metrics.json")
 async def metrics_json():
     return {
         "uptime_sec": round(time.time() - START_TIME, 1),
-        "requests": REQ_COUNT["total"]
+        "requests": REQ_COUNT["total"],
+        "llm": llm_metrics(),
+        "mongo": mongo_metrics(),
+        "archiver": archiver_metrics()
     }
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+@app.get("/health")
+async def health():
+    """Liveness plus MongoDB status; degraded still serves requests without persistence"""
+    mongo = mongo_metrics()
+    return {"status": "degraded" if mongo["degraded"] else "ok", "mongo": mongo}
+
+load_assets()
+app.mount("/static", PrecompressedStaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["asset_url"] = asset_url
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -184,10 +217,11 @@ async def home(request: Request):
     if not session_id:
         session_id = str(uuid.uuid4())
     
-    # Create or get user session
-    session = await db_manager.get_user_session(session_id)
-    if not session:
-        session = await db_manager.create_user_session(session_id)
+    # Create or get user session; bots only get one once they interact
+    if not is_bot(request):
+        session = await db_manager.get_user_session(session_id)
+        if not session:
+            session = await db_manager.create_user_session(session_id)
     
     response = templates.TemplateResponse("index.html", {"request": request})
     response.set_cookie(key="session_id", value=session_id, httponly=True)
@@ -249,15 +283,12 @@ async def recommend_destinations(
         """
 
         # Call OpenAI API
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        response = await chat_completion(
+            "recommend",
+            [
                 {"role": "system", "content": "You are a travel expert who provides personalized destination recommendations. Always respond with valid JSON."},
                 {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7
+            ]
         )
 
         # Parse the response
@@ -381,15 +412,13 @@ async def generate_itinerary(
         """
 
         # Call OpenAI API
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        response = await chat_completion(
+            "itinerary",
+            [
                 {"role": "system", "content": "You are a travel expert who creates detailed, personalized itineraries. Always respond with valid JSON."},
                 {"role": "user", "content": prompt}
             ],
-            max_tokens=1000,
-            temperature=0.7
+            duration=duration
         )
 
         # Parse the response
@@ -441,7 +470,7 @@ async def generate_itinerary(
             }
 
         # Get TripAdvisor reviews
-        reviews = get_tripadvisor_reviews(destination, style)
+        reviews = await get_tripadvisor_reviews(destination, style)
         
         # Generate restaurant links for each day
         for day in itinerary_data.get('itinerary', []):
@@ -523,15 +552,12 @@ async def chat_with_ai(chat_message: ChatMessage, request: Request):
         """
         
         # Call OpenAI API
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        response = await chat_completion(
+            "chat",
+            [
                 {"role": "system", "content": "You are a knowledgeable and friendly AI travel assistant. Provide helpful, accurate, and engaging responses about travel topics. Keep responses conversational and informative."},
                 {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7
+            ]
         )
         
         ai_response = response.choices[0].message.content.strip()
@@ -586,6 +612,14 @@ async def get_user_preferences(request: Request):
         return JSONResponse(content={"preferences": session.preferences})
     return JSONResponse(content={"preferences": {}})
 
+@app.get("/api/trending-destinations")
+async def get_trending_destinations(limit: int = Query(10, ge=1, le=100), style: str = None):
+    """Get the most planned destinations of the last TRENDING_WINDOW_DAYS days from the popularity counters"""
+    counters = await db_manager.get_trending_destinations(limit, style)
+    return JSONResponse(content={
+        "destinations": [{"destination": c.destination, "count": c.count} for c in counters]
+    })
+
 @app.delete("/api/travel-plan/{plan_id}")
 async def delete_travel_plan(plan_id: str, request: Request):
     """Delete a specific travel plan"""
@@ -593,13 +627,9 @@ async def delete_travel_plan(plan_id: str, request: Request):
     if not session_id:
         raise HTTPException(status_code=401, detail="Session not found")
     
-    # Delete the plan (you'll need to add this method to DatabaseManager)
-    result = await db_manager.db.travel_plans.delete_one({
-        "plan_id": plan_id,
-        "session_id": session_id
-    })
-    
-    if result.deleted_count > 0:
+    if not db_manager.available:
+        raise HTTPException(status_code=503, detail="Database temporarily unavailable")
+    if await db_manager.delete_travel_plan(plan_id, session_id):
         return JSONResponse(content={"message": "Plan deleted successfully"})
     else:
         raise HTTPException(status_code=404, detail="Plan not found")
@@ -0,0 +1,170 @@
+"""
+Archival of old travel plans and chat messages for TripCraft AI
+
+Documents older than the configured age are written in batches to gzipped
+NDJSON files and then removed from MongoDB, keeping collections and indexes
+small enough to stay in memory. Sessions need no archiving; their TTL index
+expires them (see TTL_INDEXES in app.database). Every app process runs the
+loop, but a lease document in job_locks lets only one of them archive at a time.
+
+Archival is off unless ARCHIVER_ENABLED=true, and then ARCHIVE_DIR must be set
+explicitly: on hosts with an ephemeral filesystem (Heroku, Railway, Replit) the
+files vanish on restart after the documents were already deleted.
+"""
+import os
+import gzip
+import json
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pymongo
+from pymongo.errors import DuplicateKeyError
+
+from app.database import db_manager, CHAT_RETENTION_DAYS
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR")
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_INTERVAL_SEC = int(os.getenv("ARCHIVE_INTERVAL_SEC", "3600"))
+ARCHIVE_LEASE_SEC = int(os.getenv("ARCHIVE_LEASE_SEC", "600"))
+ARCHIVE_LOCK = "archiver"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+ARCHIVER_STATUS = {
+    "last_pass": None,
+    "last_results": None,
+    "last_error": None,
+    "failures": 0,
+}
+
+# collection -> (time field, archive after N days; 0 disables)
+ARCHIVE_POLICIES = {
+    "travel_plans": ("created_at", int(os.getenv("PLAN_ARCHIVE_DAYS", "90"))),
+    "chat_messages": ("timestamp", int(os.getenv("CHAT_ARCHIVE_DAYS", "30"))),
+}
+
+def validate_retention_config() -> None:
+    """Refuse to archive without an explicit ARCHIVE_DIR, or if the chat TTL
+    would delete chats before they are archived"""
+    if not ARCHIVE_DIR:
+        raise ValueError(
+            "ARCHIVER_ENABLED=true requires ARCHIVE_DIR on durable storage; archived "
+            "documents are deleted from MongoDB once written there"
+        )
+    chat_archive_days = ARCHIVE_POLICIES["chat_messages"][1]
+    if chat_archive_days > 0 and CHAT_RETENTION_DAYS > 0 and chat_archive_days >= CHAT_RETENTION_DAYS:
+        raise ValueError(
+            f"CHAT_ARCHIVE_DAYS ({chat_archive_days}) must be below CHAT_RETENTION_DAYS "
+            f"({CHAT_RETENTION_DAYS}), or the TTL index deletes chats before they are archived"
+        )
+
+async def acquire_lease(name: str = ARCHIVE_LOCK, lease_sec: int = ARCHIVE_LEASE_SEC) -> bool:
+    """Take or renew a lease held in job_locks; False if another worker holds it"""
+    now = datetime.utcnow()
+    try:
+        await db_manager.db.job_locks.update_one(
+            {"_id": name, "$or": [{"expires_at": {"$lt": now}}, {"owner": WORKER_ID}]},
+            {"$set": {"owner": WORKER_ID, "expires_at": now + timedelta(seconds=lease_sec)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The lock exists, is unexpired and belongs to someone else
+        return False
+    return True
+
+async def release_lease(name: str = ARCHIVE_LOCK) -> None:
+    await db_manager.db.job_locks.delete_one({"_id": name, "owner": WORKER_ID})
+
+def batch_deadline():
+    """Replace the app client's per-request timeoutMS for archiver work.
+
+    The deadline matches the lease: work that outlives it may overlap with
+    the next lease holder anyway.
+    """
+    return pymongo.timeout(ARCHIVE_LEASE_SEC)
+
+def archiver_metrics() -> Dict[str, Any]:
+    """Outcome of the last archive pass for /metrics.json"""
+    return dict(ARCHIVER_STATUS)
+
+def write_ndjson_gz(path: str, documents: List[Dict[str, Any]]) -> None:
+    """Write documents as one gzipped JSON object per line"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for doc in documents:
+            f.write(json.dumps(doc, default=str, ensure_ascii=False))
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+async def inline_plan_payloads(documents: List[Dict[str, Any]]) -> None:
+    """Resolve content refs so archived plans are self-contained"""
+    refs = [doc.get(field) for doc in documents for field in ("itinerary_ref", "reviews_ref")]
+    contents = await db_manager.get_contents([ref for ref in refs if ref])
+    for doc in documents:
+        if doc.get("itinerary_ref"):
+            doc["itinerary"] = contents.get(doc["itinerary_ref"], {})
+        if doc.get("reviews_ref"):
+            doc["reviews"] = contents.get(doc["reviews_ref"], [])
+
+async def archive_collection(collection: str, time_field: str, older_than_days: int,
+                             batch_size: int = ARCHIVE_BATCH_SIZE, archive_dir: str = ARCHIVE_DIR) -> int:
+    """Move documents older than the cutoff to NDJSON archives, one file per batch"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    run_stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    archived = 0
+    batch_no = 0
+    while True:
+        # Renew the lease per batch so a long pass is not taken over midway
+        if not await acquire_lease():
+            break
+        with batch_deadline():
+            cursor = db_manager.db[collection].find(
+                {time_field: {"$lt": cutoff}}
+            ).sort(time_field, 1).limit(batch_size)
+            documents = [doc async for doc in cursor]
+            if not documents:
+                break
+            if collection == "travel_plans":
+                await inline_plan_payloads(documents)
+
+            path = os.path.join(archive_dir, collection, f"{collection}-{run_stamp}-{batch_no:05d}.ndjson.gz")
+            await asyncio.to_thread(write_ndjson_gz, path, documents)
+            # Only delete once the batch is safely on disk
+            await db_manager.db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in documents]}})
+        archived += len(documents)
+        batch_no += 1
+    return archived
+
+async def run_archive_pass() -> Dict[str, int]:
+    """Archive every collection with an enabled policy"""
+    results = {}
+    if not ARCHIVE_DIR or not db_manager.available or not await acquire_lease():
+        return results
+    try:
+        for collection, (time_field, days) in ARCHIVE_POLICIES.items():
+            if days > 0:
+                results[collection] = await archive_collection(collection, time_field, days)
+        if results.get("travel_plans"):
+            await acquire_lease()
+            with batch_deadline():
+                results["content_blobs"] = await db_manager.prune_content_blobs()
+    finally:
+        await release_lease()
+    return results
+
+async def archiver_loop():
+    """Background task: archive old documents every ARCHIVE_INTERVAL_SEC"""
+    while True:
+        try:
+            results = await run_archive_pass()
+            if any(results.values()):
+                print(f"Archived old documents: {results}")
+            ARCHIVER_STATUS.update(last_pass=datetime.utcnow().isoformat(), last_results=results)
+        except Exception as e:
+            # Surfaced under "archiver" in /metrics.json so a failing pass is noticed
+            ARCHIVER_STATUS["failures"] += 1
+            ARCHIVER_STATUS["last_error"] = f"{type(e).__name__}: {str(e) or 'timed out'}"[:300]
+            print(f"Archiver pass failed: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SEC)
@@ -0,0 +1,137 @@
+let chatbotOpen = false;
+
+function toggleChatbot() {
+    const chatbot = document.getElementById('chatbot');
+    chatbotOpen = !chatbotOpen;
+    chatbot.style.display = chatbotOpen ? 'flex' : 'none';
+
+    if (chatbotOpen) {
+        document.getElementById('chatbot-input').focus();
+    }
+}
+
+function sendMessage(event) {
+    event.preventDefault();
+    const input = document.getElementById('chatbot-input');
+    const message = input.value.trim();
+
+    if (!message) return;
+
+    // Add user message
+    addMessage(message, 'user');
+    input.value = '';
+
+    // Show typing indicator
+    showTyping();
+
+    // Send to backend
+    fetch('/chat', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ message: message })
+    })
+    .then(response => response.json())
+    .then(data => {
+        hideTyping();
+        addMessage(data.response, 'bot');
+    })
+    .catch(error => {
+        hideTyping();
+        addMessage('Sorry, I encountered an error. Please try again.', 'bot');
+    });
+}
+
+function addMessage(text, sender) {
+    const messages = document.getElementById('chatbot-messages');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${sender}`;
+
+    const avatar = document.createElement('div');
+    avatar.className = 'message-avatar';
+    avatar.textContent = sender === 'user' ? '👤' : '🤖';
+
+    const content = document.createElement('div');
+    content.className = 'message-content';
+    content.textContent = text;
+
+    messageDiv.appendChild(avatar);
+    messageDiv.appendChild(content);
+    messages.appendChild(messageDiv);
+
+    // Scroll to bottom
+    messages.scrollTop = messages.scrollHeight;
+}
+
+function showTyping() {
+    document.getElementById('typing-indicator').style.display = 'block';
+    document.getElementById('chatbot-messages').scrollTop = document.getElementById('chatbot-messages').scrollHeight;
+}
+
+function hideTyping() {
+    document.getElementById('typing-indicator').style.display = 'none';
+}
+
+function askQuestion(question) {
+    // Add user message
+    addMessage(question, 'user');
+
+    // Show typing indicator
+    showTyping();
+
+    // Send to backend
+    fetch('/chat', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ message: question })
+    })
+    .then(response => response.json())
+    .then(data => {
+        hideTyping();
+        addMessage(data.response, 'bot');
+    })
+    .catch(error => {
+        hideTyping();
+        addMessage('Sorry, I encountered an error. Please try again.', 'bot');
+    });
+}
+
+// Handle Enter key
+document.getElementById('chatbot-input').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') {
+        sendMessage(e);
+    }
+});
+
+// Destination results fragment
+function toggleItinerary(index) {
+    const itinerary = document.getElementById('itinerary-' + index);
+    if (itinerary.style.display === 'none') {
+        itinerary.style.display = 'block';
+    } else {
+        itinerary.style.display = 'none';
+    }
+}
+
+function showLoading(index) {
+    const itinerary = document.getElementById('itinerary-' + index);
+    const loading = document.getElementById('loading-' + index);
+    itinerary.style.display = 'block';
+    loading.style.display = 'block';
+}
+
+// Itinerary fragment
+function downloadItinerary(button) {
+    // Simple text download for now
+    const content = button.closest('.itinerary').innerText;
+    const blob = new Blob([content], { type: 'text/plain' });
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = button.dataset.destination + '_itinerary.txt';
+    a.click();
+    window.URL.revokeObjectURL(url);
+}
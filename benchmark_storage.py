@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmark inline vs content-addressed storage of travel plan payloads
+
+Generates synthetic plans where most itineraries and reviews repeat (fallback
+payloads and identical preferences) and stores them in both layouts.
+
+Without --mongo this is an offline micro-benchmark: BSON document sizes and
+the cost of encoding and of resolving refs from an in-memory blob map through
+the payload cache. With --mongo both layouts are written to a scratch database
+and the report uses collection storage and index sizes and timed reads of
+random plans, inline versus plan + blob lookups with a cold and a warm cache.
+"""
+import os
+import time
+import random
+import argparse
+import statistics
+import bson
+from app.content_store import encode_payload, decode_payload, PayloadCache
+
+DESTINATIONS = [f"Destination {i}" for i in range(200)]
+STYLES = ["adventure", "relaxation", "culture", "food", "nightlife"]
+DURATIONS = ["3 days", "5 days", "7 days", "10 days"]
+
+def generate_plans(plans: int, unique_ratio: float, seed: int):
+    """Yield (metadata, itinerary, reviews) for synthetic plans"""
+    rng = random.Random(seed)
+    for n in range(plans):
+        destination = rng.choice(DESTINATIONS)
+        style = rng.choice(STYLES)
+        duration = rng.choice(DURATIONS)
+        # Most plans reuse a fallback or previously generated payload
+        variant = n if rng.random() < unique_ratio else 0
+        meta = {
+            "plan_id": f"plan-{n}",
+            "session_id": f"session-{n % 50000}",
+            "destination": destination,
+            "budget": "$1000-2000",
+            "style": style,
+            "duration": duration,
+            "created_at": "2026-10-19T00:00:00"
+        }
+        yield meta, make_itinerary(destination, style, duration, variant), make_reviews(destination, variant)
+
+def make_itinerary(destination: str, style: str, duration: str, variant: int) -> dict:
+    days = int(duration.split()[0])
+    return {
+        "destination": destination,
+        "summary": f"A wonderful {duration} trip to {destination} perfect for {style} travelers. (v{variant})",
+        "itinerary": [
+            {
+                "day": day,
+                "theme": f"Day {day} {style} highlights",
+                "morning": f"9:00 AM - Visit landmark {day} in {destination}",
+                "afternoon": f"2:00 PM - Guided {style} tour of district {day}",
+                "evening": "7:00 PM - Dinner at a local restaurant",
+                "meals": {
+                    "breakfast": "Hotel breakfast - Continental breakfast with local specialties",
+                    "lunch": "Local Cafe - Authentic local cuisine in a charming setting",
+                    "dinner": "Traditional Restaurant - Experience local flavors and atmosphere"
+                },
+                "cost": "$150-200"
+            }
+            for day in range(1, days + 1)
+        ],
+        "total_cost": "$800-1200"
+    }
+
+def make_reviews(destination: str, variant: int) -> list:
+    return [
+        {
+            "username": f"Traveler{n}{variant}",
+            "rating": 5 - n % 2,
+            "title": "Bucket list destination!",
+            "review": f"One of the best trips I've ever taken. {destination} offers everything a traveler could want.",
+            "tip": "Book activities in advance during peak season"
+        }
+        for n in range(3)
+    ]
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def latency_line(label: str, samples: list) -> str:
+    return (f"   {label:<34} p50={percentile(samples, 0.5):8.1f} p95={percentile(samples, 0.95):8.1f} "
+            f"p99={percentile(samples, 0.99):8.1f} mean={statistics.mean(samples):8.1f} µs")
+
+def run_offline(args):
+    """Encode-size and cache micro-benchmark; no database reads are involved"""
+    inline_bytes = 0
+    reference_bytes = 0
+    blobs = {}
+    refs = []
+    started = time.perf_counter()
+    for meta, itinerary, reviews in generate_plans(args.plans, args.unique_ratio, args.seed):
+        inline_bytes += len(bson.encode(dict(meta, itinerary=itinerary, reviews=reviews)))
+        plan_refs = []
+        for kind, payload in (("itinerary", itinerary), ("reviews", reviews)):
+            digest, encoding, data = encode_payload(payload)
+            if digest not in blobs:
+                blobs[digest] = bson.encode({"_id": digest, "kind": kind, "encoding": encoding,
+                                             "data": data, "size": len(data)})
+            plan_refs.append(digest)
+        refs.append(plan_refs)
+        reference_bytes += len(bson.encode(dict(meta, itinerary_ref=plan_refs[0], reviews_ref=plan_refs[1])))
+    encode_secs = time.perf_counter() - started
+    blob_bytes = sum(len(doc) for doc in blobs.values())
+
+    rng = random.Random(args.seed)
+    cache = PayloadCache(args.cache_size)
+    latencies = []
+    for plan_refs in rng.sample(refs, min(len(refs), args.reads)):
+        t0 = time.perf_counter()
+        for digest in plan_refs:
+            if cache.get(digest) is None:
+                doc = bson.decode(blobs[digest])
+                cache.put(digest, decode_payload(doc["encoding"], doc["data"]))
+        latencies.append((time.perf_counter() - t0) * 1e6)
+
+    total = reference_bytes + blob_bytes
+    print(f"📦 Offline micro-benchmark: {args.plans:,} plans, unique payload ratio {args.unique_ratio:.0%}, "
+          f"{len(blobs):,} distinct blobs")
+    print("   BSON document bytes (excludes storage compression and indexes):")
+    print(f"   Inline plans:                {inline_bytes / 1e6:10.1f} MB")
+    print(f"   Plans with refs + blobs:     {total / 1e6:10.1f} MB  ({inline_bytes / total:.1f}x smaller)")
+    print(f"⏱️  Hash + compress: {encode_secs / args.plans * 1e6:.1f} µs/plan")
+    print(latency_line("In-memory ref resolve via cache", latencies))
+    print(f"   Cache: size={args.cache_size} hits={cache.hits:,} misses={cache.misses:,}")
+
+def run_mongo(args):
+    """Write both layouts to a scratch database and compare sizes and reads"""
+    from pymongo import MongoClient
+    client = MongoClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    client.drop_database(args.database)
+    db = client[args.database]
+    inline, plans, blobs = db.inline_plans, db.ref_plans, db.content_blobs
+
+    inline_batch, plan_batch, seen = [], [], set()
+    for meta, itinerary, reviews in generate_plans(args.plans, args.unique_ratio, args.seed):
+        inline_batch.append(dict(meta, itinerary=itinerary, reviews=reviews))
+        plan_refs = []
+        for kind, payload in (("itinerary", itinerary), ("reviews", reviews)):
+            digest, encoding, data = encode_payload(payload)
+            if digest not in seen:
+                seen.add(digest)
+                blobs.insert_one({"_id": digest, "kind": kind, "encoding": encoding, "data": data, "size": len(data)})
+            plan_refs.append(digest)
+        plan_batch.append(dict(meta, itinerary_ref=plan_refs[0], reviews_ref=plan_refs[1]))
+        if len(inline_batch) >= 1000:
+            inline.insert_many(inline_batch)
+            plans.insert_many(plan_batch)
+            inline_batch, plan_batch = [], []
+    if inline_batch:
+        inline.insert_many(inline_batch)
+        plans.insert_many(plan_batch)
+    inline.create_index("plan_id")
+    plans.create_index("plan_id")
+
+    stats = {name: db.command("collStats", name) for name in ("inline_plans", "ref_plans", "content_blobs")}
+    size = lambda *names: sum(stats[n]["storageSize"] + stats[n]["totalIndexSize"] for n in names) / 1e6
+    print(f"📦 MongoDB ({args.database}): {args.plans:,} plans, unique payload ratio {args.unique_ratio:.0%}, "
+          f"{len(seen):,} distinct blobs")
+    print("   Storage + index size on disk:")
+    print(f"   Inline plans:                {size('inline_plans'):10.1f} MB")
+    print(f"   Plans with refs + blobs:     {size('ref_plans', 'content_blobs'):10.1f} MB")
+
+    rng = random.Random(args.seed)
+    sample = [f"plan-{n}" for n in rng.sample(range(args.plans), min(args.plans, args.reads))]
+
+    inline_ms = []
+    for plan_id in sample:
+        t0 = time.perf_counter()
+        inline.find_one({"plan_id": plan_id})
+        inline_ms.append((time.perf_counter() - t0) * 1e6)
+
+    def resolve(cache):
+        latencies = []
+        for plan_id in sample:
+            t0 = time.perf_counter()
+            doc = plans.find_one({"plan_id": plan_id})
+            digests = [doc["itinerary_ref"], doc["reviews_ref"]]
+            missing = [d for d in digests if cache.get(d) is None]
+            if missing:
+                for blob in blobs.find({"_id": {"$in": missing}}):
+                    cache.put(blob["_id"], decode_payload(blob["encoding"], blob["data"]))
+            latencies.append((time.perf_counter() - t0) * 1e6)
+        return latencies
+
+    print("⏱️  Random plan reads:")
+    print(latency_line("Inline find_one", inline_ms))
+    print(latency_line("Refs, cold cache (every read misses)", resolve(PayloadCache(0))))
+    warm = PayloadCache(args.cache_size)
+    warm_ms = resolve(warm)
+    print(latency_line(f"Refs, cache size {args.cache_size}", warm_ms))
+    print(f"   Cache: hits={warm.hits:,} misses={warm.misses:,}")
+    if not args.keep:
+        client.drop_database(args.database)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=300000)
+    parser.add_argument("--unique-ratio", type=float, default=0.1,
+                        help="fraction of plans with freshly generated payloads")
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--reads", type=int, default=20000, help="number of random plan reads to time")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo", action="store_true", help="benchmark against MongoDB at MONGODB_URL")
+    parser.add_argument("--database", default="tripcraft_ai_bench",
+                        help="scratch database, dropped first; must end in _bench")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database afterwards")
+    args = parser.parse_args()
+    # The scratch database is dropped, so never let it point at real data
+    app_database = os.getenv("MONGODB_DATABASE_NAME", "tripcraft_ai")
+    if args.mongo and (args.database == app_database or not args.database.endswith("_bench")):
+        parser.error(f"--database {args.database!r} would be dropped; use a name ending in _bench "
+                     f"other than the app database {app_database!r}")
+    if args.mongo:
+        run_mongo(args)
+    else:
+        run_offline(args)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, precompressed static assets and report payload sizes
+
+Writes app/static/dist (see app/assets.py) and prints the raw, gzip and brotli
+size of each asset and of the HTMX fragments rendered with sample data.
+"""
+import os
+import gzip
+import argparse
+from jinja2 import Environment, FileSystemLoader
+from app.assets import build_assets, asset_url, load_assets, DIST_DIR, brotli
+
+SAMPLE_DESTINATIONS = [
+    {
+        "name": name,
+        "description": "Perfect for your preferences with beautiful scenery, rich culture, and great food.",
+        "cost": "$1000-1800",
+        "booking_links": {
+            "hotels": f"https://www.booking.com/searchresults.html?ss={name}",
+            "flights": f"https://www.expedia.com/Flights-Search?leg1=from:Anywhere,to:{name}",
+            "activities": f"https://www.viator.com/{name}-attractions/d98-ttd"
+        }
+    }
+    for name in ("Bali, Indonesia", "Porto, Portugal", "Costa Rica")
+]
+
+def sample_itinerary(days: int) -> dict:
+    links = {key: f"https://example.com/{key}" for key in ("website", "menu", "booking", "reviews", "maps")}
+    return {
+        "destination": "Porto, Portugal",
+        "summary": "A wonderful 1 week trip to Porto perfect for food travelers.",
+        "itinerary": [
+            {
+                "day": day,
+                "theme": "Cultural Immersion",
+                "morning": "9:00 AM - Visit museums and historical sites",
+                "afternoon": "2:00 PM - Guided tour of the city",
+                "evening": "7:00 PM - Evening entertainment",
+                "meals": {
+                    meal: {"description": "Local Cafe - Authentic local cuisine", "restaurant": "Local Cafe", "links": links}
+                    for meal in ("breakfast", "lunch", "dinner")
+                },
+                "cost": "$200-250"
+            }
+            for day in range(1, days + 1)
+        ],
+        "total_cost": "$800-1200"
+    }
+
+SAMPLE_REVIEWS = [
+    {"username": f"Traveler{n}", "rating": 5 - n % 2, "title": "Bucket list destination!",
+     "review": "One of the best trips I've ever taken.", "tip": "Book activities in advance"}
+    for n in range(3)
+]
+
+def sizes(data: bytes) -> str:
+    line = f"{len(data):>8,} raw {len(gzip.compress(data, 9)):>8,} gzip"
+    if brotli is not None:
+        line += f" {len(brotli.compress(data, quality=11)):>8,} br"
+    return line
+
+def report_fragments(template_dir: str):
+    env = Environment(loader=FileSystemLoader(template_dir), autoescape=True)
+    env.globals["asset_url"] = asset_url
+    fragments = {
+        "results.html": ("results.html", {"destinations": SAMPLE_DESTINATIONS, "budget": "1000-2000",
+                                          "style": "food", "duration": "1week"}),
+        "itinerary.html (7 days)": ("itinerary.html", {"itinerary": sample_itinerary(7), "reviews": SAMPLE_REVIEWS}),
+        "index.html": ("index.html", {}),
+    }
+    print(f"\n📄 Rendered templates ({template_dir})")
+    for label, (name, context) in fragments.items():
+        html = env.get_template(name).render(request=None, **context).encode("utf-8")
+        print(f"   {label:<26} {sizes(html)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--templates", default="app/templates",
+                        help="template directory to measure, e.g. a checkout of an older version")
+    args = parser.parse_args()
+
+    manifest = build_assets()
+    load_assets()
+    print("📦 Static assets")
+    for name, entry in sorted(manifest.items()):
+        with open(os.path.join(DIST_DIR, entry["file"]), "rb") as f:
+            print(f"   {entry['file']:<26} {sizes(f.read())}")
+    if brotli is None:
+        print("   (install brotli to emit .br variants)")
+    report_fragments(args.templates)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Rebuild the destination popularity counters from travel_plans
+"""
+import asyncio
+import argparse
+from dotenv import load_dotenv
+from app.database import connect_to_mongo, close_mongo_connection, db_manager
+
+async def rebuild(compact_only: bool, include_all_time: bool):
+    """Recompute (or just compact) the destination_popularity collection"""
+    try:
+        await connect_to_mongo(timeout_ms=None)
+        if compact_only:
+            removed = await db_manager.compact_popularity()
+            print(f"✅ Removed {removed} expired popularity counters")
+        else:
+            groups = await db_manager.rebuild_popularity(include_all_time=include_all_time)
+            print(f"✅ Rebuilt popularity counters from {groups} destination/style/day groups")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--compact-only", action="store_true",
+                        help="only drop day/week counters past their retention window")
+    parser.add_argument("--include-all-time", action="store_true",
+                        help="also recount all-time counters; archived plans are then no longer counted")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.compact_only, args.include_all_time))
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Replay a traffic capture against TripCraft AI and report latency distributions
+
+Reads the JSONL written by the capture middleware (CAPTURE_REQUESTS_PATH) and
+re-issues each request at its original offset, optionally sped up. By default
+the app runs in-process with the OpenAI client replaced by a stub that sleeps
+in proportion to the completion tokens recorded for each request, or by a
+prompt cache filled from real calls. MongoDB is used as configured by MONGODB_URL.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import statistics
+from collections import defaultdict
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+import httpx
+
+# Completion tokens per LLM call for the request being replayed
+RECORDED_TOKENS: ContextVar = ContextVar("recorded_tokens", default=None)
+
+STUB_CONTENT = {
+    "reviews": '{"reviews": []}',
+    "recommend": '{"destinations": []}',
+    "itinerary": '{"destination": "Replay", "summary": "Replayed trip", "itinerary": [], "total_cost": "$0"}',
+    "chat": "Replayed response.",
+}
+
+def load_capture(path: str, routes: set) -> list:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if routes and record["path"] not in routes:
+                continue
+            records.append(record)
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+class StubCompletions:
+    """Stands in for client.chat.completions, optionally backed by a prompt cache"""
+
+    def __init__(self, ms_per_token: float, cache: dict, cache_path: str, real_factory):
+        self.ms_per_token = ms_per_token
+        self.cache = cache
+        self.cache_path = cache_path
+        self.real_factory = real_factory
+        self.completion_tokens = 100
+
+    def create(self, **kwargs):
+        prompt = json.dumps(kwargs.get("messages", []), sort_keys=True)
+        key = hashlib.sha256(f"{kwargs.get('model')}|{prompt}".encode()).hexdigest()
+        if self.cache_path is not None:
+            if key not in self.cache:
+                response = self.real_factory().chat.completions.create(**kwargs)
+                self.cache[key] = response.choices[0].message.content
+                with open(self.cache_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "content": self.cache[key]}) + "\n")
+            content = self.cache[key]
+        else:
+            content = STUB_CONTENT["chat"]
+            for marker, task in (("TripAdvisor", "reviews"), ("suggest 3", "recommend"), ("itinerary", "itinerary")):
+                if marker in prompt:
+                    content = STUB_CONTENT[task]
+                    break
+        recorded = RECORDED_TOKENS.get()
+        tokens = recorded if recorded is not None else self.completion_tokens
+        tokens = min(kwargs.get("max_tokens") or tokens, tokens)
+        # Block like the real synchronous client; the app runs it in a worker thread
+        time.sleep(tokens * self.ms_per_token / 1000)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=tokens)
+        )
+
+def install_llm_stub(ms_per_token: float, cache_path: str) -> StubCompletions:
+    import openai
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                cache[entry["key"]] = entry["content"]
+    completions = StubCompletions(ms_per_token, cache, cache_path, openai.OpenAI)
+    stub_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    openai.OpenAI = lambda *args, **kwargs: stub_client
+    return completions
+
+def build_request(record: dict) -> dict:
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    request = {"method": record["method"], "url": url, "headers": {}}
+    if record.get("user_agent"):
+        request["headers"]["user-agent"] = record["user_agent"]
+    if record.get("session"):
+        request["headers"]["cookie"] = f"session_id=replay-{record['session']}"
+    if "form" in record:
+        request["data"] = record["form"]
+    elif "json" in record:
+        request["json"] = record["json"]
+    return request
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def report(results: list, wall_secs: float):
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[(result["method"], result["path"])].append(result)
+
+    print(f"\n📊 Replayed {len(results)} requests in {wall_secs:.1f}s")
+    header = f"{'route':<32} {'n':>6} {'err':>5} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'orig p50':>9}"
+    print(header)
+    print("-" * len(header))
+    for (method, path), items in sorted(by_route.items()):
+        latencies = [r["latency_ms"] for r in items]
+        original = [r["original_ms"] for r in items if r["original_ms"] is not None]
+        errors = sum(1 for r in items if r["status"] is None or r["status"] >= 500)
+        print(f"{method + ' ' + path:<32} {len(items):>6} {errors:>5} "
+              f"{percentile(latencies, 0.5):>9.1f} {percentile(latencies, 0.9):>9.1f} "
+              f"{percentile(latencies, 0.99):>9.1f} {max(latencies):>9.1f} "
+              f"{(statistics.median(original) if original else float('nan')):>9.1f}")
+
+async def replay(records: list, client: httpx.AsyncClient, speed: float, concurrency: int) -> list:
+    results = []
+    semaphore = asyncio.Semaphore(concurrency)
+    origin = records[0]["ts"]
+    start = time.perf_counter()
+
+    async def fire(record):
+        if speed > 0:
+            delay = (record["ts"] - origin) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        llm = record.get("llm") or {}
+        if llm.get("calls") and llm.get("completion_tokens"):
+            RECORDED_TOKENS.set(llm["completion_tokens"] // llm["calls"])
+        async with semaphore:
+            t0 = time.perf_counter()
+            status = None
+            try:
+                response = await client.request(**build_request(record))
+                status = response.status_code
+            except httpx.HTTPError as e:
+                print(f"❌ {record['method']} {record['path']}: {e}", file=sys.stderr)
+            results.append({
+                "method": record["method"],
+                "path": record["path"],
+                "status": status,
+                "latency_ms": (time.perf_counter() - t0) * 1000,
+                "original_ms": record.get("duration_ms"),
+            })
+
+    await asyncio.gather(*(fire(record) for record in records))
+    return results
+
+async def main(args):
+    records = load_capture(args.capture, set(args.route or []))
+    if not records:
+        print("No requests to replay")
+        return
+
+    timeout = httpx.Timeout(args.timeout)
+    started = time.perf_counter()
+    if args.target:
+        async with httpx.AsyncClient(base_url=args.target, timeout=timeout) as client:
+            results = await replay(records, client, args.speed, args.concurrency)
+    else:
+        os.environ.setdefault("ARCHIVER_ENABLED", "false")
+        os.environ.pop("CAPTURE_REQUESTS_PATH", None)
+        completions = install_llm_stub(args.llm_ms_per_token, args.llm_cache)
+        completions.completion_tokens = args.completion_tokens
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=timeout) as client:
+                results = await replay(records, client, args.speed, args.concurrency)
+    report(results, time.perf_counter() - started)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="JSONL capture file")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="pacing multiplier: 1 = original, 10 = ten times faster, 0 = no pacing")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--route", action="append", help="only replay this path (repeatable)")
+    parser.add_argument("--target", help="replay against a running server instead of in-process")
+    parser.add_argument("--llm-ms-per-token", type=float, default=20.0,
+                        help="simulated LLM generation time per completion token")
+    parser.add_argument("--completion-tokens", type=int, default=300,
+                        help="simulated completion length when the capture has no token counts")
+    parser.add_argument("--llm-cache", help="prompt cache JSONL; misses call the real API and are stored")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(main(parser.parse_args()))
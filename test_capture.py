@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test that traffic capture masks free text and records LLM token usage
+"""
+import json
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.capture import TrafficCaptureMiddleware, record_llm_usage
+
+async def plan(request):
+    # Stand-in for a handler that reads its input and makes two LLM calls
+    await request.body()
+    for completion_tokens in (40, 60):
+        record_llm_usage(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=completion_tokens)))
+    return JSONResponse({"ok": True})
+
+def capture(requests):
+    """POST each set of httpx kwargs through the middleware and return the captured records"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "capture.jsonl")
+        app = TrafficCaptureMiddleware(Starlette(routes=[Route("/plan", plan, methods=["POST"])]), path)
+
+        async def send_all():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                for kwargs in requests:
+                    await http.post("/plan", **kwargs)
+
+        asyncio.run(send_all())
+        app._file.close()
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+def test_capture_masks_text_and_records_usage():
+    print("🔍 Testing traffic capture...")
+    form, nested, listed = capture([
+        {"data": {"destination": "Lisbon", "style": "cultural", "message": "my phone is 555"}},
+        {"json": {"style": "relaxed", "message": {"text": "call me at home", "tags": ["private note", 3]}}},
+        {"json": [{"message": "secret"}, "also secret"]},
+    ])
+
+    assert form["form"] == {"destination": "Lisbon", "style": "cultural", "message": "x" * 15}, form["form"]
+    print("✅ Form preferences are kept and free text is masked")
+    assert nested["json"] == {"style": "relaxed", "message": {"text": "x" * 15, "tags": ["x" * 12, 3]}}, \
+        nested["json"]
+    assert listed["json"] == [{"message": "xxxxxx"}, "x" * 11], listed["json"]
+    print("✅ Text nested in JSON objects and lists is masked")
+
+    assert form["llm"] == {"calls": 2, "prompt_tokens": 20, "completion_tokens": 100}, form["llm"]
+    assert form["status"] == 200 and form["path"] == "/plan"
+    print("✅ Token usage of the request's LLM calls is recorded")
+
+if __name__ == "__main__":
+    try:
+        test_capture_masks_text_and_records_usage()
+    except AssertionError as e:
+        print(f"\n❌ Capture test failed: {e}")
+        raise SystemExit(1)
+    print("\n🎉 All capture tests passed!")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test degraded mode, the health ping, index setup and lazy database binding without a MongoDB server
+"""
+import asyncio
+import httpx
+from pymongo.errors import AutoReconnect, DuplicateKeyError
+import app.database as database_module
+from app.database import db_manager, ping_mongo, ensure_indexes_once, mongo_metrics, MONGO_HEALTH, ChatMessage
+
+class FakeResult:
+    deleted_count = 1
+    inserted_id = "fake"
+
+class FakeCollection:
+    """Collection stand-in that returns canned results or raises a configured error"""
+
+    def __init__(self, error=None, docs=None):
+        self.error = error
+        self.docs = docs or []
+
+    async def _call(self, result):
+        if self.error:
+            raise self.error
+        return result
+
+    def insert_one(self, doc):
+        return self._call(FakeResult())
+
+    def delete_one(self, query):
+        return self._call(FakeResult())
+
+    def create_index(self, *args, **kwargs):
+        return self._call("index")
+
+    async def list_indexes(self):
+        for index in getattr(self, "indexes", []):
+            yield index
+
+    def drop_index(self, name):
+        self.dropped = getattr(self, "dropped", []) + [name]
+        return self._call(None)
+
+    def find(self, *args, **kwargs):
+        if self.error:
+            raise self.error
+        return FakeCursor(self.docs)
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+class FakeDatabase:
+    """Database stand-in whose collections all share one behaviour and whose ping can be slowed"""
+
+    def __init__(self, collection=None, ping_delay=0.0, ping_error=None):
+        self.collection = collection or FakeCollection()
+        self.ping_delay = ping_delay
+        self.ping_error = ping_error
+
+    def __getattr__(self, name):
+        return self.collection
+
+    def __getitem__(self, name):
+        return self.collection
+
+    async def command(self, *args, **kwargs):
+        await asyncio.sleep(self.ping_delay)
+        if self.ping_error:
+            raise self.ping_error
+        return {"ok": 1}
+
+def use_database(fake, healthy=True):
+    """Bind a fake database and reset the health state"""
+    database_module.database = fake
+    MONGO_HEALTH.update(degraded=not healthy, consecutive_failures=0, bad_pings=0, last_error=None,
+                        indexes_ready=False)
+    db_manager.read_cache = type(db_manager.read_cache)()
+
+def test_lazy_binding():
+    """db_manager follows the module global instead of capturing it at import"""
+    print("🔍 Testing lazy database binding...")
+    fake = FakeDatabase()
+    use_database(fake)
+    assert db_manager.db is fake, "db_manager.db should resolve the current database"
+    use_database(None, healthy=False)
+    assert db_manager.db is None and not db_manager.available, "An unbound database is unavailable"
+    print("✅ db_manager resolves the database at call time")
+
+def test_breaker_trips_only_on_availability_errors():
+    print("🔍 Testing which errors degrade the app...")
+    use_database(FakeDatabase(FakeCollection(error=DuplicateKeyError("E11000 duplicate key"))))
+    message = ChatMessage(message_id="m1", session_id="s1", user_message="hi", ai_response="hello")
+    assert asyncio.run(db_manager.save_chat_message(message)) is False, "A failed write returns the default"
+    assert db_manager.available, "A duplicate key error should not degrade the app"
+    print("✅ Duplicate key errors fail only that call")
+
+    use_database(FakeDatabase(FakeCollection(error=AutoReconnect("connection reset"))))
+    assert asyncio.run(db_manager.delete_travel_plan("p1", "s1")) is False, "A failed delete returns False"
+    assert not db_manager.available, "A connection error should degrade the app"
+    assert MONGO_HEALTH["consecutive_failures"] == 1 and "AutoReconnect" in MONGO_HEALTH["last_error"]
+    print("✅ Connection errors switch to degraded mode")
+
+def test_stale_reads_while_degraded():
+    print("🔍 Testing stale reads while degraded...")
+    doc = {"message_id": "m1", "session_id": "s1", "user_message": "hi", "ai_response": "hello"}
+    use_database(FakeDatabase(FakeCollection(docs=[doc])))
+    fresh = asyncio.run(db_manager.get_chat_history("s1"))
+    assert [m.message_id for m in fresh] == ["m1"], "The healthy read returns the stored messages"
+
+    database_module.database = FakeDatabase(FakeCollection(error=AssertionError("degraded reads must not query")))
+    MONGO_HEALTH["degraded"] = True
+    stale = asyncio.run(db_manager.get_chat_history("s1"))
+    assert [m.message_id for m in stale] == ["m1"], "The last good read is served while degraded"
+    assert asyncio.run(db_manager.get_chat_history("s2")) == [], "Uncached reads fall back to the default"
+    print("✅ Degraded reads are served from the cache without touching MongoDB")
+
+def test_ping_thresholds():
+    print("🔍 Testing ping thresholds...")
+    slow_ms = database_module.MONGODB_SLOW_PING_MS
+    database_module.MONGODB_SLOW_PING_MS = 20
+    try:
+        use_database(FakeDatabase(ping_delay=0.05), healthy=False)
+        assert asyncio.run(ping_mongo(cold=True)), "A slow cold ping should not degrade the app"
+        assert db_manager.available, "The app leaves degraded mode after the cold ping"
+        for _ in range(database_module.MONGODB_DEGRADE_AFTER_PINGS - 1):
+            assert asyncio.run(ping_mongo()), "A single slow warm ping should not degrade the app"
+        assert not asyncio.run(ping_mongo()), "Consecutive slow warm pings should degrade the app"
+        assert not db_manager.available
+
+        use_database(FakeDatabase(ping_error=AutoReconnect("no server")))
+        assert not asyncio.run(ping_mongo()), "A failed ping reports unhealthy"
+        assert db_manager.available, "One failed ping is not enough to degrade"
+        assert mongo_metrics()["consecutive_failures"] == 1
+        database_module.record_error(asyncio.TimeoutError())
+        assert MONGO_HEALTH["last_error"] == "TimeoutError: timed out", MONGO_HEALTH["last_error"]
+        database_module.database = FakeDatabase()
+        assert asyncio.run(ping_mongo()) and MONGO_HEALTH["bad_pings"] == 0, "A good ping resets the count"
+    finally:
+        database_module.MONGODB_SLOW_PING_MS = slow_ms
+    print("✅ Only consecutive slow or failed warm pings degrade the app")
+
+def test_indexes_created_after_recovery():
+    print("🔍 Testing index creation after a failed boot...")
+    use_database(FakeDatabase(FakeCollection(error=AutoReconnect("no server"))))
+    asyncio.run(ensure_indexes_once())
+    assert not MONGO_HEALTH["indexes_ready"], "Failed index creation is retried later"
+    database_module.database = FakeDatabase()
+    asyncio.run(ensure_indexes_once())
+    assert MONGO_HEALTH["indexes_ready"], "Indexes are created once MongoDB answers"
+    print("✅ Indexes are created on the first healthy ping")
+
+def test_zero_retention_drops_ttl_index():
+    print("🔍 Testing that retention 0 removes an existing TTL index...")
+    collection = FakeCollection()
+    collection.indexes = [
+        {"name": "_id_", "key": {"_id": 1}},
+        {"name": "timestamp_1", "key": {"timestamp": 1}, "expireAfterSeconds": 86400},
+        {"name": "session_id_1_timestamp_-1", "key": {"session_id": 1, "timestamp": -1}},
+    ]
+    use_database(FakeDatabase(collection))
+    asyncio.run(database_module.drop_ttl_index("chat_messages", "timestamp"))
+    assert collection.dropped == ["timestamp_1"], f"Only the TTL index should be dropped: {collection.dropped}"
+    print("✅ Setting retention to 0 drops the TTL index")
+
+def test_delete_returns_503_while_degraded():
+    print("🔍 Testing the delete route while degraded...")
+    from app.main import app
+
+    async def delete():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", cookies={"session_id": "s1"}) as http:
+            return await http.delete("/api/travel-plan/p1")
+
+    use_database(FakeDatabase(), healthy=False)
+    assert asyncio.run(delete()).status_code == 503, "Deletes are refused while degraded"
+    use_database(FakeDatabase())
+    assert asyncio.run(delete()).status_code == 200, "Deletes succeed when MongoDB is healthy"
+    print("✅ Deleting a plan returns 503 while degraded")
+
+if __name__ == "__main__":
+    try:
+        test_lazy_binding()
+        test_breaker_trips_only_on_availability_errors()
+        test_stale_reads_while_degraded()
+        test_ping_thresholds()
+        test_indexes_created_after_recovery()
+        test_zero_retention_drops_ttl_index()
+        test_delete_returns_503_while_degraded()
+    except AssertionError as e:
+        print(f"\n❌ Degraded mode test failed: {e}")
+        raise SystemExit(1)
+    print("\n🎉 All degraded mode tests passed!")
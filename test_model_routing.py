@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test per-task model routing against local OpenAI-compatible stub servers
+"""
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.llm import ROUTES, LLM_STATS, ModelRoute, chat_completion, llm_metrics, trip_days
+
+def start_stub_server(delay_sec: float):
+    """Start a chat completions stub that answers after delay_sec and records requests"""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            received.append(body)
+            time.sleep(delay_sec)
+            payload = json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": '{"reviews": []}'},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 20, "completion_tokens": body["max_tokens"] // 10, "total_tokens": 0}
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def test_model_routing():
+    """Route light and heavy tasks to different stub servers and compare"""
+    print("🔍 Testing model routing...")
+    fast, fast_requests, fast_url = start_stub_server(0.02)
+    slow, slow_requests, slow_url = start_stub_server(0.2)
+    messages = [{"role": "user", "content": "Plan a trip"}]
+    saved_routes = dict(ROUTES)
+    itinerary_tokens = LLM_STATS["itinerary"].completion_tokens
+    chat_errors = LLM_STATS["chat"].errors
+
+    try:
+        ROUTES["reviews"] = ModelRoute(model="small-local", max_tokens=300, temperature=0.8, base_url=fast_url)
+        ROUTES["itinerary"] = ModelRoute(model="large-remote", max_tokens=250, tokens_per_day=150,
+                                         min_tokens=1000, max_tokens_cap=3000, base_url=slow_url)
+
+        assert trip_days("weekend") == 3 and trip_days("1week") == 7 and trip_days("2weeks") == 14, \
+            "Trip durations parsed from form values"
+        print("✅ Parsed trip durations from form values")
+
+        for _ in range(5):
+            asyncio.run(chat_completion("reviews", messages))
+        asyncio.run(chat_completion("itinerary", messages, duration="weekend"))
+        asyncio.run(chat_completion("itinerary", messages, duration="2weeks"))
+
+        assert len(fast_requests) == 5 and all(r["model"] == "small-local" for r in fast_requests), \
+            f"Reviews should go to the fast server with the small model: {fast_requests}"
+        print("✅ Reviews went to the fast local server with the small model")
+        assert [r["max_tokens"] for r in slow_requests] == [1000, 2350], \
+            f"Itinerary max_tokens should scale with duration: {[r['max_tokens'] for r in slow_requests]}"
+        print("✅ Itinerary max_tokens scaled with trip duration, floored at 1000")
+        assert all(r["model"] == "large-remote" for r in slow_requests), \
+            "Itineraries should go to the slow server with the large model"
+        print("✅ Itineraries went to the slow server with the large model")
+
+        metrics = llm_metrics()
+        print(f"📊 {json.dumps({t: metrics[t] for t in ('reviews', 'itinerary')}, indent=2)}")
+        assert metrics["reviews"]["p50_ms"] < metrics["itinerary"]["p50_ms"], \
+            "Recorded latency should reflect the server speeds"
+        print("✅ Recorded latency reflects the server speeds")
+        assert LLM_STATS["itinerary"].completion_tokens - itinerary_tokens == 100 + 235, \
+            "Completion token usage should be recorded"
+        print("✅ Recorded completion token usage")
+
+        async def ticks_during_call():
+            # Count event loop ticks while the completion waits on the slow server
+            ticks = 0
+            call = asyncio.create_task(chat_completion("itinerary", messages))
+            while not call.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            await call
+            return ticks
+
+        assert asyncio.run(ticks_during_call()) >= 5, "LLM calls should not block the event loop"
+        print("✅ The event loop keeps running during LLM calls")
+
+        ROUTES["chat"] = ModelRoute(base_url="http://127.0.0.1:9/v1")
+        try:
+            asyncio.run(chat_completion("chat", messages))
+        except Exception:
+            pass
+        else:
+            raise AssertionError("Unreachable server should raise an error")
+        assert LLM_STATS["chat"].errors - chat_errors == 1, "Failed calls should be counted as errors"
+        print("✅ Failed calls are counted as errors")
+    finally:
+        ROUTES.clear()
+        ROUTES.update(saved_routes)
+        fast.shutdown()
+        slow.shutdown()
+
+if __name__ == "__main__":
+    try:
+        test_model_routing()
+    except AssertionError as e:
+        print(f"\n❌ Model routing test failed: {e}")
+        raise SystemExit(1)
+    print("\n🎉 All model routing tests passed!")
@@ -5,7 +5,8 @@ Test MongoDB connection and basic operations
 import asyncio
 import os
 from dotenv import load_dotenv
-from app.database import connect_to_mongo, close_mongo_connection, db_manager
+import app.database as database_module
+from app.database import connect_to_mongo, close_mongo_connection, db_manager, ping_mongo, mongo_metrics
 
 async def test_mongodb():
     """Test MongoDB connection and basic operations"""
@@ -14,7 +15,23 @@ async def test_mongodb():
     try:
         # Connect to MongoDB
         await connect_to_mongo()
+        if not db_manager.available:
+            # connect_to_mongo starts in degraded mode instead of raising
+            raise RuntimeError(f"MongoDB is unavailable: {database_module.MONGO_HEALTH['last_error']}")
         print("✅ Connected to MongoDB successfully!")
+
+        # db_manager resolves the database lazily, after connect_to_mongo has bound it
+        if db_manager.db is database_module.database:
+            print("✅ db_manager is bound to the connected database")
+        else:
+            print("❌ db_manager is not bound to the connected database")
+
+        # Test the health ping and metrics
+        if await ping_mongo():
+            metrics = mongo_metrics()
+            print(f"✅ Ping: {metrics['rtt_ms']} ms, indexes ready: {metrics['indexes_ready']}")
+        else:
+            print(f"❌ Ping failed or slow: {database_module.MONGO_HEALTH['last_error']}")
         
         # Test creating a user session
         session_id = "test_session_123"
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test that travel plans round-trip through content-addressed blobs and feed the
+popularity counters, using an in-memory database
+"""
+import asyncio
+from datetime import datetime, timedelta
+import app.database as database_module
+from app.content_store import PayloadCache
+from app.database import db_manager, TravelPlan, MONGO_HEALTH
+
+def matches(doc, query):
+    for field, condition in query.items():
+        if isinstance(condition, dict) and "$in" in condition:
+            if doc.get(field) not in condition["$in"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+class MemoryCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction=1):
+        self.docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+class MemoryCollection:
+    """Just enough of a Motor collection for the plan save and load paths, counting round trips"""
+
+    def __init__(self):
+        self.docs = []
+        self.calls = []
+
+    async def insert_one(self, doc):
+        self.calls.append("insert_one")
+        self.docs.append(dict(doc, _id=doc.get("_id", len(self.docs))))
+        return type("InsertResult", (), {"inserted_id": self.docs[-1]["_id"]})()
+
+    async def bulk_write(self, ops, ordered=True):
+        self.calls.append("bulk_write")
+        for op in ops:
+            found = [doc for doc in self.docs if matches(doc, op._filter)]
+            if not found and op._upsert:
+                found = [dict(op._filter, **op._doc.get("$setOnInsert", {}))]
+                self.docs.append(found[0])
+            for doc in found:
+                doc.update(op._doc.get("$set", {}))
+                for field, amount in op._doc.get("$inc", {}).items():
+                    doc[field] = doc.get(field, 0) + amount
+
+    def aggregate(self, pipeline):
+        """$match, $group ($sum/$last/$max), $sort and $limit, as used by the popularity reads"""
+        self.calls.append("aggregate")
+        rows = [dict(doc) for doc in self.docs]
+        for stage in pipeline:
+            if "$match" in stage:
+                rows = [row for row in rows if matches(row, stage["$match"])]
+            elif "$group" in stage:
+                spec = dict(stage["$group"])
+                key_field = spec.pop("_id").lstrip("$")
+                groups = {}
+                for row in rows:
+                    group = groups.setdefault(row[key_field], {"_id": row[key_field]})
+                    for out, (op, field) in ((out, next(iter(acc.items()))) for out, acc in spec.items()):
+                        value = row[field.lstrip("$")]
+                        if op == "$sum":
+                            group[out] = group.get(out, 0) + value
+                        elif op == "$max":
+                            group[out] = max(group.get(out, value), value)
+                        else:
+                            group[out] = value
+                rows = list(groups.values())
+            elif "$sort" in stage:
+                for field, direction in reversed(list(stage["$sort"].items())):
+                    rows.sort(key=lambda row: row[field], reverse=direction < 0)
+            elif "$limit" in stage:
+                rows = rows[:stage["$limit"]]
+        return MemoryCursor(rows)
+
+    def find(self, query=None, projection=None):
+        self.calls.append("find")
+        return MemoryCursor([doc for doc in self.docs if matches(doc, query or {})])
+
+class MemoryDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, MemoryCollection())
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+def use_memory_database():
+    database_module.database = MemoryDatabase()
+    MONGO_HEALTH.update(degraded=False, consecutive_failures=0, bad_pings=0, last_error=None)
+    db_manager.content_cache = PayloadCache()
+    db_manager.read_cache = PayloadCache()
+    return database_module.database
+
+def make_plan(plan_id, itinerary, reviews):
+    return TravelPlan(plan_id=plan_id, session_id="s1", destination="Lisbon", budget="mid",
+                      style="cultural", duration="weekend", itinerary=itinerary, reviews=reviews)
+
+ITINERARY = {"destination": "Lisbon", "itinerary": [{"day": 1, "theme": "Alfama", "meals": {"dinner": "Tasca"}}]}
+REVIEWS = [{"username": "ana", "rating": 5, "title": "Great", "review": "Loved it", "tip": "Take tram 28"}]
+
+def test_plan_round_trip():
+    print("🔍 Testing plan save and load through content refs...")
+    db = use_memory_database()
+    assert asyncio.run(db_manager.save_travel_plan(make_plan("p1", ITINERARY, REVIEWS))), "The plan is saved"
+    assert db.content_blobs.calls == ["bulk_write"], f"Both blobs go in one round trip: {db.content_blobs.calls}"
+    stored = db.travel_plans.docs[0]
+    assert "itinerary" not in stored and "reviews" not in stored, "Payloads are not stored inline"
+    assert stored["itinerary_ref"] and stored["reviews_ref"], "The plan references its blobs"
+    print("✅ Saving a plan writes both blobs in one bulk_write")
+
+    # A cold cache forces the payloads to be decoded from the stored blobs
+    db_manager.content_cache = PayloadCache()
+    plans = asyncio.run(db_manager.get_travel_plans("s1"))
+    assert len(plans) == 1 and plans[0].plan_id == "p1"
+    assert plans[0].itinerary == ITINERARY and plans[0].reviews == REVIEWS, "Payloads survive the round trip"
+    print("✅ A saved plan reads back with the same itinerary and reviews")
+
+def test_identical_payloads_stored_once():
+    print("🔍 Testing that identical payloads share one blob...")
+    db = use_memory_database()
+    asyncio.run(db_manager.save_travel_plan(make_plan("p1", ITINERARY, REVIEWS)))
+    asyncio.run(db_manager.save_travel_plan(make_plan("p2", ITINERARY, [])))
+    assert len(db.content_blobs.docs) == 3, f"Expected 3 distinct blobs, got {len(db.content_blobs.docs)}"
+    print("✅ The shared itinerary is stored once")
+
+def test_legacy_inline_plan_loads():
+    print("🔍 Testing plans saved before content addressing...")
+    db = use_memory_database()
+    legacy = make_plan("old", ITINERARY, REVIEWS).dict()
+    asyncio.run(db.travel_plans.insert_one(legacy))
+    plans = asyncio.run(db_manager.get_travel_plans("s1"))
+    assert [p.plan_id for p in plans] == ["old"], "The legacy plan is returned"
+    assert plans[0].itinerary == ITINERARY and plans[0].reviews == REVIEWS, "Inline payloads are kept"
+    assert db.content_blobs.calls == [], "No blob lookup is needed for inline payloads"
+    print("✅ Legacy plans with inline payloads still load")
+
+def test_trending_uses_a_rolling_window():
+    print("🔍 Testing the rolling trending window...")
+    use_memory_database()
+    now = datetime.utcnow()
+    for destination, days_ago in (("Lisbon", 0), ("Lisbon", 6), ("Porto", 1), ("Porto", 8), ("Porto", 9)):
+        asyncio.run(db_manager.record_popularity(destination, "cultural", now - timedelta(days=days_ago)))
+    trending = asyncio.run(db_manager.get_trending_destinations(10, days=7))
+    assert [(c.destination, c.count) for c in trending] == [("Lisbon", 2), ("Porto", 1)], \
+        f"Only the last 7 days count: {[(c.destination, c.count) for c in trending]}"
+    assert [c.destination for c in asyncio.run(db_manager.get_trending_destinations(1, days=7))] == ["Lisbon"]
+    print("✅ Trending sums the last 7 day buckets, across ISO week boundaries")
+
+if __name__ == "__main__":
+    try:
+        test_plan_round_trip()
+        test_identical_payloads_stored_once()
+        test_legacy_inline_plan_loads()
+        test_trending_uses_a_rolling_window()
+    except AssertionError as e:
+        print(f"\n❌ Plan storage test failed: {e}")
+        raise SystemExit(1)
+    print("\n🎉 All plan storage tests passed!")